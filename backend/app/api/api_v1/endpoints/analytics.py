@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional
+import math
 from app.services.analytics import analytics_service
 from app.models.schemas import PerformanceMetrics, RiskMetrics
 from app.auth.dependencies import get_current_active_user
@@ -7,6 +8,11 @@ from app.models.database import User
 
 router = APIRouter()
 
+def _require_finite(values: Optional[List[float]], name: str) -> None:
+    """Reject NaN/inf in caller-supplied returns; the metrics assume finite inputs."""
+    if values and not all(map(math.isfinite, values)):
+        raise HTTPException(status_code=400, detail=f"{name} must contain only finite numbers")
+
 @router.post("/performance", response_model=PerformanceMetrics)
 def calculate_performance_metrics(
     portfolio_returns: List[float],
@@ -22,6 +28,9 @@ def calculate_performance_metrics(
     if len(portfolio_returns) < 30:
         raise HTTPException(status_code=400, detail="At least 30 data points required for meaningful analysis")
     
+    _require_finite(portfolio_returns, "Portfolio returns")
+    _require_finite(benchmark_returns, "Benchmark returns")
+    
     try:
         performance_metrics = analytics_service.calculate_performance_metrics(
             returns=portfolio_returns,
@@ -44,6 +53,9 @@ def calculate_risk_metrics(
     if not portfolio_returns:
         raise HTTPException(status_code=400, detail="Portfolio returns cannot be empty")
     
+    _require_finite(portfolio_returns, "Portfolio returns")
+    _require_finite(benchmark_returns, "Benchmark returns")
+    
     try:
         risk_metrics = analytics_service.calculate_risk_metrics(
             returns=portfolio_returns,
@@ -1,11 +1,19 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi.responses import ORJSONResponse
+from typing import Any, List, Optional
 from datetime import datetime
+import orjson
 from app.services.data_service import data_service
 from app.models.schemas import StockData, HistoricalData, HistoricalDataRequest, SectorData, APIResponse
 
 router = APIRouter()
 
+class NumpyJSONResponse(ORJSONResponse):
+    """JSON response that serializes NumPy arrays natively."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
 @router.get("/stocks/{symbol}", response_model=StockData)
 def get_stock_data(symbol: str):
     """Get current stock data for a specific symbol."""
@@ -26,7 +34,10 @@ def get_historical_data(
     """Get historical stock data for a specific symbol."""
     try:
         hist_data = data_service.get_historical_data(symbol, period, interval)
-        return HistoricalData(**hist_data)
+        # Serialize the arrays directly instead of boxing them into a model;
+        # returning a Response skips response_model validation, so the payload
+        # is checked against HistoricalData in test_main.py instead
+        return NumpyJSONResponse({field: hist_data[field] for field in HistoricalData.model_fields})
     except HTTPException:
         raise
     except Exception as e:
@@ -52,7 +63,8 @@ def get_stocks_historical_data(request: HistoricalDataRequest):
                 # Log the error but continue with other symbols
                 results[symbol] = {"error": str(symbol_error)}
         
-        return {
+        # Returned as a Response, so it is not validated against response_model
+        return NumpyJSONResponse({
             "success": True,
             "data": results,
             "request_params": {
@@ -62,7 +74,7 @@ def get_stocks_historical_data(request: HistoricalDataRequest):
                 "start_date": request.start_date,
                 "end_date": request.end_date
             }
-        }
+        })
     except Exception as e:
         return {
             "success": False,
@@ -4,6 +4,8 @@ from app.services.optimization import portfolio_optimizer
 from app.models.schemas import (
     OptimizationRequest,
     BlackLittermanRequest,
+    BatchOptimizationRequest,
+    BatchOptimizationResult,
     OptimizationResult,
     OptimizationType,
     RiskTolerance,
@@ -47,6 +49,54 @@ def optimize_portfolio(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Optimization failed: {str(e)}")
 
+@router.post("/optimize/batch", response_model=BatchOptimizationResult)
+def optimize_portfolio_batch(
+    request: BatchOptimizationRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Run several optimization methods on the same symbols in one request.
+    
+    The price history is loaded and the inputs estimated once for all methods.
+    """
+    
+    if len(request.symbols) < 2:
+        raise HTTPException(status_code=400, detail="At least 2 symbols required for optimization")
+    
+    if len(request.symbols) > 50:
+        raise HTTPException(status_code=400, detail="Too many symbols. Maximum 50 allowed.")
+    
+    if not request.methods:
+        raise HTTPException(status_code=400, detail="At least 1 optimization method required")
+    
+    # Each optimizer only takes the parameters that apply to it
+    monte_carlo_kwargs = {"risk_tolerance": request.risk_tolerance}
+    if request.num_portfolios:
+        monte_carlo_kwargs["num_portfolios"] = request.num_portfolios
+    
+    supported_kwargs = {
+        OptimizationType.MEAN_VARIANCE: {"risk_tolerance": request.risk_tolerance, "target_return": request.target_return},
+        OptimizationType.BLACK_LITTERMAN: {"risk_tolerance": request.risk_tolerance},
+        OptimizationType.RISK_PARITY: {},
+        OptimizationType.MINIMUM_VARIANCE: {},
+        OptimizationType.MONTE_CARLO: monte_carlo_kwargs
+    }
+    
+    try:
+        batch = portfolio_optimizer.optimize_batch(
+            symbols=request.symbols,
+            method_kwargs={method: supported_kwargs[method] for method in dict.fromkeys(request.methods)},
+            period=f"{request.lookback_period}d" if request.lookback_period else "1y"
+        )
+        return BatchOptimizationResult(
+            results={method: OptimizationResult(**result) for method, result in batch["results"].items()},
+            errors=batch["errors"]
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch optimization failed: {str(e)}")
+
 @router.post("/black-litterman", response_model=OptimizationResult)
 def black_litterman_optimization(
     request: BlackLittermanRequest,
@@ -21,6 +21,16 @@ class Settings(BaseSettings):
     # Market data settings
     DEFAULT_MARKET_SUFFIX: str = ".NS"  # NSE suffix for Indian stocks
     CACHE_DURATION_MINUTES: int = 15  # Cache market data for 15 minutes
+    YF_REQUESTS_PER_MINUTE: int = 60  # Outgoing Yahoo Finance request budget
+    YF_REQUESTS_PER_HOUR: int = 360
+    HISTORY_CACHE_DIR: str = "history_cache"  # Parquet price history kept across restarts
+    YF_HTTP_CACHE_PATH: str = "yfinance.cache"  # SQLite cache of raw Yahoo Finance responses
+    
+    # Simulation settings
+    MONTE_CARLO_THREADS: int = 0  # Cores used by Monte Carlo paths; 0 uses all
+    
+    # Logging
+    LOG_LEVEL: str = "WARNING"
     
     # Risk-free rate (India 10-year bond yield approximation)
     RISK_FREE_RATE: float = 0.07  # 7% annual
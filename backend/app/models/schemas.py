@@ -151,6 +151,18 @@ class OptimizationResult(BaseModel):
     optimization_type: str
     metadata: Dict[str, Any] = {}
 
+class BatchOptimizationRequest(BaseModel):
+    symbols: List[str]
+    methods: List[OptimizationType]
+    risk_tolerance: Optional[RiskTolerance] = RiskTolerance.MODERATE
+    target_return: Optional[float] = None
+    num_portfolios: Optional[int] = Field(None, ge=100, le=100_000)  # Monte Carlo only
+    lookback_period: Optional[int] = Field(252, ge=30)  # Trading days
+
+class BatchOptimizationResult(BaseModel):
+    results: Dict[str, OptimizationResult]
+    errors: Dict[str, str] = {}  # Methods that failed, with the reason
+
 # Analytics schemas
 class PerformanceMetrics(BaseModel):
     total_return: float
@@ -0,0 +1,115 @@
+"""Numba kernels for the portfolio optimizers.
+
+Every kernel is declared with explicit C-contiguous signatures, so it is
+compiled (or loaded from the on-disk cache) eagerly at import and the first
+optimization pays no JIT latency. Array sizes are not part of a signature,
+so one compilation serves every number of assets.
+"""
+import numpy as np
+from numba import njit, prange
+
+
+@njit('f8(f8[::1], f8[:, ::1])', cache=True, fastmath=True)
+def variance(weights, cov):
+    """Portfolio variance w^T Σ w."""
+    return weights @ (cov @ weights)
+
+
+@njit('f8[::1](f8[::1], f8[:, ::1])', cache=True, fastmath=True)
+def variance_grad(weights, cov):
+    """Gradient of the portfolio variance, 2 Σ w."""
+    return 2.0 * (cov @ weights)
+
+
+@njit('f8(f8[::1], f8[::1], f8[:, ::1], f8)', cache=True, fastmath=True)
+def negative_sharpe(weights, mu, cov, risk_free_rate):
+    """Negative Sharpe ratio, with a large penalty for a zero-volatility portfolio."""
+    vol = np.sqrt(weights @ (cov @ weights))
+    if vol == 0.0:
+        return 1e6
+    return -(weights @ mu - risk_free_rate) / vol
+
+
+@njit('f8[::1](f8[::1], f8[::1], f8[:, ::1], f8)', cache=True, fastmath=True)
+def negative_sharpe_grad(weights, mu, cov, risk_free_rate):
+    """Gradient of the negative Sharpe ratio."""
+    cov_w = cov @ weights
+    vol = np.sqrt(weights @ cov_w)
+    if vol == 0.0:
+        return np.zeros_like(weights)
+    excess_return = weights @ mu - risk_free_rate
+    return -(mu * vol - excess_return * cov_w / vol) / (vol * vol)
+
+
+@njit('f8(f8[::1], f8[:, ::1])', cache=True, fastmath=True)
+def risk_parity_objective(weights, cov):
+    """Squared distance of each asset's share of portfolio risk from 1/n."""
+    n_assets = weights.shape[0]
+    cov_w = cov @ weights
+    vol = np.sqrt(weights @ cov_w)
+    if vol == 0.0:
+        return 1e6
+
+    contrib = weights * (cov_w / vol)
+    total = contrib.sum()
+    target = 1.0 / n_assets
+    acc = 0.0
+    for i in range(n_assets):
+        diff = contrib[i] / total - target
+        acc += diff * diff
+    return acc
+
+
+@njit('f8[::1](f8[::1], f8[:, ::1])', cache=True, fastmath=True)
+def risk_parity_grad(weights, cov):
+    """Gradient of the risk parity objective.
+
+    Relative contributions are r = w * Σw / v with v = w^T Σ w, so for
+    errors e = r - 1/n the gradient is 2/v * (e * Σw + Σ(e * w) - 2 Σw (e · r)).
+    """
+    cov_w = cov @ weights
+    var = weights @ cov_w
+    if var == 0.0:
+        return np.zeros_like(weights)
+
+    relative = weights * cov_w / var
+    errors = relative - 1.0 / weights.shape[0]
+    return 2.0 / var * (errors * cov_w + cov @ (errors * weights) - 2.0 * cov_w * (errors @ relative))
+
+
+@njit(
+    [
+        'UniTuple(f8[::1], 3)(f8[:, ::1], f8[::1], f8[:, ::1], f8)',
+        'UniTuple(f4[::1], 3)(f4[:, ::1], f4[::1], f4[:, ::1], f4)',
+    ],
+    parallel=True, cache=True, fastmath=True,
+)
+def portfolio_stats(weights, mu, cov, risk_free_rate):
+    """Return, volatility and Sharpe ratio of every row of ``weights``.
+
+    Rows are independent, so they are spread across cores with ``prange``;
+    a zero-volatility row gets a Sharpe ratio of 0. Arithmetic and outputs
+    follow the dtype of ``weights``, so float32 inputs stay in float32.
+    """
+    n_portfolios, n_assets = weights.shape
+    zero = weights.dtype.type(0)
+    returns = np.empty(n_portfolios, dtype=weights.dtype)
+    vols = np.empty(n_portfolios, dtype=weights.dtype)
+    sharpes = np.empty(n_portfolios, dtype=weights.dtype)
+
+    for k in prange(n_portfolios):
+        w = weights[k]
+        ret = zero
+        var = zero
+        for i in range(n_assets):
+            ret += w[i] * mu[i]
+            cov_w = zero
+            for j in range(n_assets):
+                cov_w += cov[i, j] * w[j]
+            var += w[i] * cov_w
+        vol = np.sqrt(var)
+        returns[k] = ret
+        vols[k] = vol
+        sharpes[k] = (ret - risk_free_rate) / vol if vol > zero else zero
+
+    return returns, vols, sharpes
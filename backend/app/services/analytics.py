@@ -1,4 +1,6 @@
+import logging
 import numpy as np
+import numexpr as ne
 import pandas as pd
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
@@ -7,6 +9,8 @@ from app.models.schemas import PerformanceMetrics, RiskMetrics
 import warnings
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
 class AnalyticsService:
     """Service for portfolio analytics and risk metrics."""
     
@@ -17,25 +21,38 @@ class AnalyticsService:
         self,
         returns: List[float],
         benchmark_returns: Optional[List[float]] = None,
-        risk_free_rate: float = 0.07
+        risk_free_rate: float = 0.07,
+        cumulative_returns: Optional[np.ndarray] = None,
+        drawdown: Optional[np.ndarray] = None
     ) -> PerformanceMetrics:
-        """Calculate comprehensive performance metrics."""
+        """Calculate comprehensive performance metrics.
         
-        returns_array = np.array(returns)
+        ``cumulative_returns`` and ``drawdown`` may be passed in when the caller
+        has already computed them for the same returns series.
+        """
         
-        # Remove any NaN or infinite values
-        returns_array = returns_array[np.isfinite(returns_array)]
+        # Returns are scrubbed of NaN/inf at the data-service boundary, and
+        # caller-supplied ones are rejected by the API when not finite
+        returns_array = np.asarray(returns, dtype=np.float64)
         
         if len(returns_array) == 0:
             raise ValueError("No valid returns data provided")
         
+        if cumulative_returns is None:
+            cumulative_returns = np.cumprod(1 + returns_array)
+        if drawdown is None:
+            drawdown = self._calculate_drawdown(cumulative_returns)
+        
         # Basic metrics
-        total_return = np.prod(1 + returns_array) - 1
+        total_return = cumulative_returns[-1] - 1
         annualized_return = np.power(1 + total_return, self.trading_days_per_year / len(returns_array)) - 1
         volatility = np.std(returns_array) * np.sqrt(self.trading_days_per_year)
         
         # Sharpe ratio
-        excess_returns = returns_array - risk_free_rate / self.trading_days_per_year
+        excess_returns = ne.evaluate(
+            "r - rf",
+            local_dict={"r": returns_array, "rf": risk_free_rate / self.trading_days_per_year}
+        )
         sharpe_ratio = np.mean(excess_returns) / np.std(excess_returns) * np.sqrt(self.trading_days_per_year) if np.std(excess_returns) != 0 else 0
         
         # Sortino ratio (using downside deviation)
@@ -44,9 +61,6 @@ class AnalyticsService:
         sortino_ratio = (annualized_return - risk_free_rate) / downside_deviation if downside_deviation != 0 else 0
         
         # Maximum drawdown
-        cumulative_returns = np.cumprod(1 + returns_array)
-        rolling_max = np.maximum.accumulate(cumulative_returns)
-        drawdown = (cumulative_returns - rolling_max) / rolling_max
         max_drawdown = np.min(drawdown)
         
         # Calmar ratio
@@ -59,8 +73,8 @@ class AnalyticsService:
         # Beta and Alpha (if benchmark provided)
         beta = None
         alpha = None
-        if benchmark_returns:
-            benchmark_array = np.array(benchmark_returns)
+        if benchmark_returns is not None and len(benchmark_returns) > 0:
+            benchmark_array = np.asarray(benchmark_returns, dtype=np.float64)
             if len(benchmark_array) == len(returns_array):
                 covariance = np.cov(returns_array, benchmark_array)[0, 1]
                 benchmark_variance = np.var(benchmark_array)
@@ -86,20 +100,19 @@ class AnalyticsService:
     def calculate_risk_metrics(
         self,
         returns: List[float],
-        benchmark_returns: Optional[List[float]] = None
+        benchmark_returns: Optional[List[float]] = None,
+        drawdown: Optional[np.ndarray] = None
     ) -> RiskMetrics:
         """Calculate risk-specific metrics."""
         
-        returns_array = np.array(returns)
-        returns_array = returns_array[np.isfinite(returns_array)]
+        returns_array = np.asarray(returns, dtype=np.float64)
         
         # Volatility
         volatility = np.std(returns_array) * np.sqrt(self.trading_days_per_year)
         
         # Maximum drawdown
-        cumulative_returns = np.cumprod(1 + returns_array)
-        rolling_max = np.maximum.accumulate(cumulative_returns)
-        drawdown = (cumulative_returns - rolling_max) / rolling_max
+        if drawdown is None:
+            drawdown = self._calculate_drawdown(np.cumprod(1 + returns_array))
         max_drawdown = np.min(drawdown)
         
         # VaR and CVaR
@@ -112,8 +125,8 @@ class AnalyticsService:
         
         # Tracking error (if benchmark provided)
         tracking_error = None
-        if benchmark_returns:
-            benchmark_array = np.array(benchmark_returns)
+        if benchmark_returns is not None and len(benchmark_returns) > 0:
+            benchmark_array = np.asarray(benchmark_returns, dtype=np.float64)
             if len(benchmark_array) == len(returns_array):
                 excess_returns = returns_array - benchmark_array
                 tracking_error = np.std(excess_returns) * np.sqrt(self.trading_days_per_year)
@@ -162,24 +175,24 @@ class AnalyticsService:
         portfolio_data = {}
         for symbol in symbols:
             try:
-                print(f"Fetching data for symbol: {symbol}")
+                logger.debug("Fetching data for symbol: %s", symbol)
                 hist_data = data_service.get_historical_data(symbol, period="max")
                 if hist_data and 'dates' in hist_data and 'returns' in hist_data:
                     portfolio_data[symbol] = {
                         'dates': hist_data['dates'],
                         'returns': hist_data['returns']
                     }
-                    print(f"Successfully fetched {len(hist_data['dates'])} data points for {symbol}")
+                    logger.debug("Successfully fetched %d data points for %s", len(hist_data['dates']), symbol)
                 else:
-                    print(f"Invalid data structure for {symbol}: {hist_data}")
+                    logger.warning("Invalid data structure for %s: %s", symbol, hist_data)
             except Exception as e:
-                print(f"Error fetching data for {symbol}: {e}")
+                logger.warning("Error fetching data for %s: %s", symbol, e)
                 # Continue with other symbols instead of failing completely
                 continue
         
         # Check if we have any portfolio data at all
         if not portfolio_data:
-            print("No portfolio data available, using synthetic data")
+            logger.warning("No portfolio data available, using synthetic data")
             # Generate synthetic data for all symbols
             for symbol in symbols:
                 # Generate simple synthetic data
@@ -192,17 +205,17 @@ class AnalyticsService:
         
         # Get benchmark data
         try:
-            print(f"Fetching benchmark data for: {benchmark}")
+            logger.debug("Fetching benchmark data for: %s", benchmark)
             benchmark_data = data_service.get_historical_data(benchmark, period="max")
             if not benchmark_data or 'dates' not in benchmark_data or 'returns' not in benchmark_data:
-                print(f"Invalid benchmark data structure: {benchmark_data}")
+                logger.warning("Invalid benchmark data structure: %s", benchmark_data)
                 # Use fallback benchmark data
                 benchmark_data = {
                     'dates': [datetime.now().strftime("%Y-%m-%d")],
                     'returns': [0.0]
                 }
         except Exception as e:
-            print(f"Error fetching benchmark data for {benchmark}: {e}")
+            logger.warning("Error fetching benchmark data for %s: %s", benchmark, e)
             # Use fallback benchmark data
             benchmark_data = {
                 'dates': [datetime.now().strftime("%Y-%m-%d")],
@@ -230,7 +243,7 @@ class AnalyticsService:
         # Limit to reasonable number of data points for analysis
         max_points = min(min_data_points, len(benchmark_data['returns']), 252)  # Max 1 year
         
-        print(f"Analyzing {max_points} data points")
+        logger.debug("Analyzing %d data points", max_points)
         
         for i in range(max_points):
             portfolio_return = 0
@@ -276,21 +289,20 @@ class AnalyticsService:
                 valid_dates.append(current_date.strftime("%Y-%m-%d"))
                 current_date += timedelta(days=1)
             
-            print(f"Warning: Using synthetic data for portfolio analysis due to data issues")
+            logger.warning("Using synthetic data for portfolio analysis due to data issues")
+        
+        # Compound the portfolio series once and share it with every helper
+        portfolio_cumulative = np.cumprod(1 + np.asarray(portfolio_returns, dtype=np.float64))
+        portfolio_drawdown = self._calculate_drawdown(portfolio_cumulative)
         
-        # Calculate performance metrics
+        # Calculate metrics, reusing the shared cumulative and drawdown series
         performance_metrics = self.calculate_performance_metrics(
-            portfolio_returns, 
-            benchmark_returns
+            portfolio_returns, benchmark_returns,
+            cumulative_returns=portfolio_cumulative, drawdown=portfolio_drawdown
         )
-        
-        # Calculate risk metrics
         risk_metrics = self.calculate_risk_metrics(
-            portfolio_returns,
-            benchmark_returns
+            portfolio_returns, benchmark_returns, drawdown=portfolio_drawdown
         )
-        
-        # Calculate benchmark performance separately
         benchmark_metrics = self.calculate_performance_metrics(benchmark_returns)
         
         # Calculate additional analytics
@@ -302,10 +314,15 @@ class AnalyticsService:
         sector_allocation = self._calculate_sector_allocation(symbols, weights)
         
         # Create historical performance data
-        historical_performance = self._create_historical_performance(portfolio_returns, benchmark_returns, valid_dates)
+        historical_performance = self._create_historical_performance(
+            portfolio_returns, benchmark_returns, valid_dates,
+            portfolio_cumulative=portfolio_cumulative
+        )
         
         # Find drawdown periods
-        drawdown_periods = self._find_drawdown_periods(portfolio_returns, valid_dates)
+        drawdown_periods = self._find_drawdown_periods(
+            portfolio_returns, valid_dates, drawdown=portfolio_drawdown
+        )
         
         return {
             # Main performance metrics
@@ -389,13 +406,22 @@ class AnalyticsService:
         # Convert to percentages
         return {sector: weight * 100 for sector, weight in sector_allocation.items()}
     
-    def _find_drawdown_periods(self, returns: List[float], dates: List[str]) -> List[Dict]:
+    def _calculate_drawdown(self, cumulative_returns: np.ndarray) -> np.ndarray:
+        """Calculate the drawdown series from cumulative growth."""
+        rolling_max = np.maximum.accumulate(cumulative_returns)
+        # Fused single pass instead of a subtraction and a division temporary
+        return ne.evaluate("(c - m) / m", local_dict={"c": cumulative_returns, "m": rolling_max})
+    
+    def _find_drawdown_periods(
+        self,
+        returns: List[float],
+        dates: List[str],
+        drawdown: Optional[np.ndarray] = None
+    ) -> List[Dict]:
         """Find significant drawdown periods."""
         
-        returns_array = np.array(returns)
-        cumulative_returns = np.cumprod(1 + returns_array)
-        rolling_max = np.maximum.accumulate(cumulative_returns)
-        drawdown = (cumulative_returns - rolling_max) / rolling_max
+        if drawdown is None:
+            drawdown = self._calculate_drawdown(np.cumprod(1 + np.asarray(returns, dtype=np.float64)))
         
         # Find drawdown periods (when drawdown < -5%)
         significant_drawdowns = []
@@ -527,7 +553,8 @@ class AnalyticsService:
         self, 
         portfolio_returns: List[float], 
         benchmark_returns: List[float], 
-        dates: List[str]
+        dates: List[str],
+        portfolio_cumulative: Optional[np.ndarray] = None
     ) -> List[Dict]:
         """Create historical performance data for charting."""
         
@@ -535,25 +562,23 @@ class AnalyticsService:
             return []
         
         # Calculate cumulative values starting from 100
-        portfolio_cumulative = [100]
-        benchmark_cumulative = [100]
-        
-        for i, (port_ret, bench_ret) in enumerate(zip(portfolio_returns, benchmark_returns)):
-            portfolio_cumulative.append(portfolio_cumulative[-1] * (1 + port_ret))
-            benchmark_cumulative.append(benchmark_cumulative[-1] * (1 + bench_ret))
+        n_points = min(len(portfolio_returns), len(benchmark_returns))
+        if portfolio_cumulative is None:
+            portfolio_cumulative = np.cumprod(1 + np.asarray(portfolio_returns, dtype=np.float64))
+        portfolio_values = 100 * portfolio_cumulative[:n_points]
+        benchmark_values = 100 * np.cumprod(1 + np.asarray(benchmark_returns[:n_points], dtype=np.float64))
         
         # Create data points (limit to reasonable number for frontend)
-        max_points = min(len(dates), len(portfolio_cumulative) - 1, 100)
+        max_points = min(len(dates), n_points, 100)
         step = max(1, len(dates) // max_points)
         
         historical_data = []
-        for i in range(0, len(dates), step):
-            if i < len(portfolio_cumulative) - 1 and i < len(benchmark_cumulative) - 1:
-                historical_data.append({
-                    "date": dates[i],
-                    "portfolio_value": round(portfolio_cumulative[i + 1], 2),
-                    "benchmark_value": round(benchmark_cumulative[i + 1], 2)
-                })
+        for i in range(0, min(len(dates), n_points), step):
+            historical_data.append({
+                "date": dates[i],
+                "portfolio_value": round(float(portfolio_values[i]), 2),
+                "benchmark_value": round(float(benchmark_values[i]), 2)
+            })
         
         return historical_data
 
@@ -1,13 +1,62 @@
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
+from app.config import settings
 from app.services.data_service import data_service
 from app.services.analytics import analytics_service
+from app.services._mc_kernel import simulate as simulate_final_values
 from app.models.schemas import BacktestResult, PerformanceMetrics
 import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import MappingProxyType
+import threading
+import numba
+from dataclasses import dataclass
+from cachetools import TTLCache, cached
 warnings.filterwarnings('ignore')
 
+# Simplified sector mapping for Indian stocks
+_SECTOR_MAPPING = MappingProxyType({
+    "HDFCBANK.NS": "Banking", "ICICIBANK.NS": "Banking", "SBIN.NS": "Banking",
+    "KOTAKBANK.NS": "Banking", "AXISBANK.NS": "Banking", "BANKBEES.NS": "Banking",
+    "TCS.NS": "IT", "INFY.NS": "IT", "WIPRO.NS": "IT", "HCLTECH.NS": "IT", "TECHM.NS": "IT",
+    "RELIANCE.NS": "Oil & Gas", "ONGC.NS": "Oil & Gas", "IOC.NS": "Oil & Gas",
+    "HINDUNILVR.NS": "FMCG", "ITC.NS": "FMCG", "NESTLEIND.NS": "FMCG", "BRITANNIA.NS": "FMCG",
+    "MARUTI.NS": "Auto", "M&M.NS": "Auto", "TATAMOTORS.NS": "Auto", "BAJAJ-AUTO.NS": "Auto",
+    "SUNPHARMA.NS": "Pharma", "DRREDDY.NS": "Pharma", "CIPLA.NS": "Pharma", "LUPIN.NS": "Pharma",
+    "TATASTEEL.NS": "Metals", "HINDALCO.NS": "Metals", "JSWSTEEL.NS": "Metals", "VEDL.NS": "Metals",
+    "LT.NS": "Infrastructure", "UBL.NS": "Infrastructure", "GRASIM.NS": "Infrastructure",
+    "BHARTIARTL.NS": "Telecom", "IDEA.NS": "Telecom",
+    "NTPC.NS": "Power", "POWERGRID.NS": "Power", "TATAPOWER.NS": "Power",
+    "GOLDBEES.NS": "Gold", "SILVERBEES.NS": "Silver",
+    "NIFTYBEES.NS": "Index ETF", "JUNIORBEES.NS": "Index ETF"
+})
+
+
+@cached(TTLCache(maxsize=256, ttl=settings.CACHE_DURATION_MINUTES * 60), lock=threading.Lock())
+def _fetch_history(symbol: str, period: str) -> Tuple[pd.DatetimeIndex, np.ndarray, np.ndarray]:
+    """Fetch and parse history once per (symbol, period) as a read-only snapshot."""
+    hist_data = data_service.get_historical_data(symbol, period=period)
+    dates = pd.to_datetime(hist_data['dates'], format="%Y-%m-%d", cache=True)
+    prices = np.asarray(hist_data['prices'], dtype=np.float64)
+    returns = np.asarray(hist_data['returns'], dtype=np.float64)
+    # Every caller shares these arrays, so an in-place write raises instead
+    # of corrupting the cache
+    prices.setflags(write=False)
+    returns.setflags(write=False)
+    return dates, prices, returns
+
+
+@dataclass(slots=True)
+class PortfolioData:
+    """Date-aligned returns and prices for a portfolio, one column per symbol."""
+    symbols: np.ndarray
+    dates: pd.DatetimeIndex
+    returns: np.ndarray
+    prices: np.ndarray
+
+
 class BacktestingService:
     """Service for strategy backtesting and performance analysis."""
     
@@ -54,23 +103,23 @@ class BacktestingService:
         portfolio_data = self._get_historical_data(symbols, start_date, end_date)
         benchmark_data = self._get_benchmark_data(benchmark, start_date, end_date)
         
-        # Align dates
-        common_dates = self._align_dates(portfolio_data, benchmark_data, start_date, end_date)
+        # Keep the portfolio dates the benchmark also covers
+        common_dates = portfolio_data.dates.intersection(benchmark_data.index).sort_values()
         
         if len(common_dates) < 30:
             raise ValueError("Insufficient data for backtesting")
         
+        returns_matrix = portfolio_data.returns[portfolio_data.dates.get_indexer(common_dates)]
+        
         # Run backtest simulation
         backtest_results = self._run_backtest_simulation(
-            portfolio_data, 
+            returns_matrix,
             weights, 
-            common_dates, 
             rebalance_frequency,
             initial_capital
         )
         
-        # Calculate benchmark returns
-        benchmark_returns = self._calculate_benchmark_returns(benchmark_data, common_dates)
+        benchmark_returns = benchmark_data.reindex(common_dates).to_numpy()
         
         # Calculate performance metrics
         performance_metrics = analytics_service.calculate_performance_metrics(
@@ -88,73 +137,76 @@ class BacktestingService:
         sector_allocation = self._calculate_sector_allocation(symbols, weights)
         
         return BacktestResult(
-            portfolio_returns=backtest_results["portfolio_returns"],
-            benchmark_returns=benchmark_returns,
-            dates=[date.strftime("%Y-%m-%d") for date in common_dates],
+            portfolio_returns=backtest_results["portfolio_returns"].tolist(),
+            benchmark_returns=benchmark_returns.tolist(),
+            dates=common_dates.strftime("%Y-%m-%d").tolist(),
             performance_metrics=performance_metrics,
             drawdown_periods=drawdown_periods,
             sector_allocation=sector_allocation
         )
     
-    def _get_historical_data(self, symbols: List[str], start_date: str, end_date: str) -> Dict:
-        """Get historical data for all symbols."""
-        data = {}
-        for symbol in symbols:
+    def _get_historical_data(self, symbols: List[str], start_date: str, end_date: str) -> PortfolioData:
+        """Get historical data for all symbols, aligned on their common dates."""
+        def fetch(symbol: str) -> Tuple[pd.DatetimeIndex, np.ndarray, np.ndarray]:
             try:
-                hist_data = data_service.get_historical_data(symbol, period="max")
-                data[symbol] = {
-                    'dates': [datetime.strptime(d, "%Y-%m-%d") for d in hist_data['dates']],
-                    'prices': hist_data['prices'],
-                    'returns': hist_data['returns']
-                }
+                return self._first_occurrences(*_fetch_history(symbol, "max"))
             except Exception as e:
                 raise ValueError(f"Could not fetch data for {symbol}: {e}")
-        return data
+        
+        # Fetches are I/O bound, so overlap them and keep the caller's symbol order
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=min(16, len(symbols))) as executor:
+            futures = {executor.submit(fetch, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                fetched[futures[future]] = future.result()
+        histories = [fetched[symbol] for symbol in symbols]
+        
+        # Align dates: intersect the int64-backed indexes, then keep the range
+        dates = histories[0][0]
+        for symbol_dates, _, _ in histories[1:]:
+            dates = dates.intersection(symbol_dates)
+        dates = dates[(dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))].sort_values()
+        
+        # Gather every symbol into contiguous (dates x symbols) buffers
+        returns = np.empty((len(dates), len(symbols)))
+        prices = np.empty((len(dates), len(symbols)))
+        for column, (symbol_dates, symbol_prices, symbol_returns) in enumerate(histories):
+            rows = symbol_dates.get_indexer(dates)
+            returns[:, column] = symbol_returns[rows]
+            prices[:, column] = symbol_prices[rows]
+        
+        return PortfolioData(
+            symbols=np.asarray(symbols),
+            dates=dates,
+            returns=returns,
+            prices=prices
+        )
     
-    def _get_benchmark_data(self, benchmark: str, start_date: str, end_date: str) -> Dict:
-        """Get benchmark data."""
+    def _get_benchmark_data(self, benchmark: str, start_date: str, end_date: str) -> pd.Series:
+        """Get benchmark returns."""
         try:
-            bench_data = data_service.get_historical_data(benchmark, period="max")
-            return {
-                'dates': [datetime.strptime(d, "%Y-%m-%d") for d in bench_data['dates']],
-                'prices': bench_data['prices'],
-                'returns': bench_data['returns']
-            }
+            dates, _, returns = self._first_occurrences(*_fetch_history(benchmark, "max"))
+            return pd.Series(returns, index=dates)
         except Exception as e:
             raise ValueError(f"Could not fetch benchmark data for {benchmark}: {e}")
     
-    def _align_dates(self, portfolio_data: Dict, benchmark_data: Dict, start_date: str, end_date: str) -> List[datetime]:
-        """Align dates across all data sources."""
-        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-        
-        # Get all possible dates from benchmark
-        all_dates = set(benchmark_data['dates'])
-        
-        # Intersect with portfolio data dates
-        for symbol_data in portfolio_data.values():
-            symbol_dates = set(symbol_data['dates'])
-            all_dates = all_dates.intersection(symbol_dates)
-        
-        # Filter by date range and sort
-        filtered_dates = [date for date in all_dates if start_dt <= date <= end_dt]
-        return sorted(filtered_dates)
+    def _first_occurrences(self, dates: pd.DatetimeIndex, prices: np.ndarray, returns: np.ndarray) -> Tuple[pd.DatetimeIndex, np.ndarray, np.ndarray]:
+        """Drop repeated dates, keeping the first row for each."""
+        first = ~dates.duplicated(keep='first')
+        return dates[first], prices[first], returns[first]
     
     def _run_backtest_simulation(
         self, 
-        portfolio_data: Dict, 
+        returns_matrix: np.ndarray, 
         target_weights: List[float], 
-        dates: List[datetime],
         rebalance_frequency: str,
         initial_capital: float
     ) -> Dict:
-        """Run the actual backtest simulation."""
+        """Run the actual backtest simulation over a (dates x symbols) returns matrix."""
         
-        symbols = list(portfolio_data.keys())
-        portfolio_values = []
-        portfolio_returns = []
-        current_weights = target_weights.copy()
-        portfolio_value = initial_capital
+        growth = 1.0 + returns_matrix
+        target = np.asarray(target_weights, dtype=np.float64)
+        n_days = len(returns_matrix)
         
         # Determine rebalance frequency
         rebalance_days = {
@@ -164,117 +216,105 @@ class BacktestingService:
             "quarterly": 63
         }
         rebalance_interval = rebalance_days.get(rebalance_frequency, 21)
-        
-        for i, date in enumerate(dates):
-            # Calculate daily returns for each asset
-            daily_returns = []
-            for symbol in symbols:
-                symbol_data = portfolio_data[symbol]
-                # Find the index for this date
-                try:
-                    date_idx = symbol_data['dates'].index(date)
-                    daily_return = symbol_data['returns'][date_idx] if date_idx < len(symbol_data['returns']) else 0
-                    daily_returns.append(daily_return)
-                except ValueError:
-                    daily_returns.append(0)  # Use 0 if date not found
-            
-            # Calculate portfolio return
-            portfolio_return = sum(w * r for w, r in zip(current_weights, daily_returns))
-            
-            # Apply transaction costs on rebalance days
-            if i > 0 and i % rebalance_interval == 0:
-                transaction_cost = self.rebalance_costs.get(rebalance_frequency, 0.0005)
-                portfolio_return -= transaction_cost
-                # Reset weights to target weights
-                current_weights = target_weights.copy()
-            else:
-                # Update weights based on returns (drift)
-                total_weight = 0
-                for j in range(len(current_weights)):
-                    current_weights[j] *= (1 + daily_returns[j])
-                    total_weight += current_weights[j]
+        transaction_cost = self.rebalance_costs.get(rebalance_frequency, 0.0005)
+        
+        # Weights start at target, drift with asset returns and are reset to
+        # target after each rebalance day (every ``rebalance_interval`` days).
+        # Each segment therefore runs from one reset to the next rebalance day.
+        if rebalance_interval == 1:
+            # Daily rebalancing holds the target every day, except that day 1
+            # still carries day 0's drift, so the whole series is one matvec
+            target_total = target.sum() or 1.0
+            portfolio_returns = returns_matrix @ target / target_total
+            if n_days > 1:
+                drifted = target * growth[0]
+                portfolio_returns[1] = drifted @ returns_matrix[1] / (drifted.sum() or 1.0)
+        else:
+            portfolio_returns = np.empty(n_days)
+            # One buffer sized for the longest segment (the first, which also
+            # covers day 0) is reused for every segment's holdings
+            holdings_buffer = np.empty((rebalance_interval + 1, len(target)))
+            segment_start = 0
+            while segment_start < n_days:
+                next_rebalance = max(1, -(-segment_start // rebalance_interval)) * rebalance_interval
+                segment_end = min(next_rebalance, n_days - 1)
+                segment = slice(segment_start, segment_end + 1)
                 
-                # Renormalize weights
-                if total_weight > 0:
-                    current_weights = [w / total_weight for w in current_weights]
-            
-            portfolio_returns.append(portfolio_return)
-            portfolio_value *= (1 + portfolio_return)
-            portfolio_values.append(portfolio_value)
+                # Holdings at the start of each day: target grown by prior days' returns
+                holdings = holdings_buffer[:segment_end - segment_start + 1]
+                holdings[0] = target
+                np.cumprod(growth[segment_start:segment_end], axis=0, out=holdings[1:])
+                holdings[1:] *= target
+                
+                # Row-wise dot of holdings with the day's asset returns, no temporary
+                total = holdings.sum(axis=1)
+                total[total == 0] = 1.0
+                portfolio_returns[segment] = np.einsum('ij,ij->i', holdings, returns_matrix[segment]) / total
+                
+                segment_start = segment_end + 1
+        
+        # Transaction costs land on every rebalance day in one vectorized step
+        portfolio_returns[rebalance_interval::rebalance_interval] -= transaction_cost
+        
+        portfolio_values = initial_capital * np.cumprod(1 + portfolio_returns)
         
         return {
             "portfolio_returns": portfolio_returns,
             "portfolio_values": portfolio_values
         }
     
-    def _calculate_benchmark_returns(self, benchmark_data: Dict, dates: List[datetime]) -> List[float]:
-        """Calculate benchmark returns for the given dates."""
-        benchmark_returns = []
-        
-        for date in dates:
-            try:
-                date_idx = benchmark_data['dates'].index(date)
-                benchmark_return = benchmark_data['returns'][date_idx] if date_idx < len(benchmark_data['returns']) else 0
-                benchmark_returns.append(benchmark_return)
-            except ValueError:
-                benchmark_returns.append(0)
-        
-        return benchmark_returns
-    
-    def _find_drawdown_periods(self, returns: List[float], dates: List[datetime]) -> List[Dict]:
+    def _find_drawdown_periods(self, returns: np.ndarray, dates: pd.DatetimeIndex) -> List[Dict]:
         """Find significant drawdown periods."""
-        returns_array = np.array(returns)
-        cumulative_returns = np.cumprod(1 + returns_array)
-        rolling_max = np.maximum.accumulate(cumulative_returns)
-        drawdown = (cumulative_returns - rolling_max) / rolling_max
+        # Work in log space: the running peak of cumulative log growth gives
+        # the same drawdown as cumprod(1 + r) without compounding rounding error
+        cumulative_log = np.cumsum(np.log1p(np.asarray(returns, dtype=np.float64)))
+        drawdown = np.expm1(cumulative_log - np.maximum.accumulate(cumulative_log))
+        
+        # A drawdown period starts when drawdown falls below -5% and ends at the
+        # first day it recovers to -1% or better; locate both with searchsorted
+        # over the threshold crossings instead of scanning day by day
+        deep_days = np.flatnonzero(drawdown < -0.05)
+        recovered_days = np.flatnonzero(drawdown >= -0.01)
+        
+        starts, ends = [], []
+        position = 0
+        while True:
+            i = np.searchsorted(deep_days, position)
+            if i == len(deep_days):
+                break
+            j = np.searchsorted(recovered_days, deep_days[i])
+            if j == len(recovered_days):
+                break  # Still in drawdown at the end of the series
+            starts.append(deep_days[i])
+            ends.append(recovered_days[j])
+            position = recovered_days[j] + 1
+        
+        if not starts:
+            return []
+        
+        # Minimum over each [start, end] window in a single reduceat call
+        bounds = np.column_stack([starts, np.asarray(ends) + 1]).ravel()
+        if bounds[-1] == len(drawdown):
+            bounds = bounds[:-1]
+        max_drawdowns = np.minimum.reduceat(drawdown, bounds)[::2]
         
-        # Find drawdown periods (when drawdown < -5%)
         significant_drawdowns = []
-        in_drawdown = False
-        start_idx = 0
-        
-        for i, dd in enumerate(drawdown):
-            if dd < -0.05 and not in_drawdown:  # Start of drawdown
-                in_drawdown = True
-                start_idx = i
-            elif dd >= -0.01 and in_drawdown:  # End of drawdown
-                in_drawdown = False
-                max_dd = np.min(drawdown[start_idx:i+1])
-                significant_drawdowns.append({
-                    "start_date": dates[start_idx].strftime("%Y-%m-%d"),
-                    "end_date": dates[i].strftime("%Y-%m-%d"),
-                    "max_drawdown": float(max_dd),
-                    "duration_days": i - start_idx + 1,
-                    "recovery_date": dates[i].strftime("%Y-%m-%d") if i < len(dates) else None
-                })
+        for start_idx, end_idx, max_dd in zip(starts, ends, max_drawdowns):
+            significant_drawdowns.append({
+                "start_date": dates[start_idx].strftime("%Y-%m-%d"),
+                "end_date": dates[end_idx].strftime("%Y-%m-%d"),
+                "max_drawdown": float(max_dd),
+                "duration_days": int(end_idx - start_idx + 1),
+                "recovery_date": dates[end_idx].strftime("%Y-%m-%d")
+            })
         
         return significant_drawdowns
     
     def _calculate_sector_allocation(self, symbols: List[str], weights: List[float]) -> Dict[str, float]:
         """Calculate sector allocation."""
-        # Simplified sector mapping for Indian stocks
-        sector_mapping = {
-            "HDFCBANK.NS": "Banking", "ICICIBANK.NS": "Banking", "SBIN.NS": "Banking",
-            "KOTAKBANK.NS": "Banking", "AXISBANK.NS": "Banking", "BANKBEES.NS": "Banking",
-            "TCS.NS": "IT", "INFY.NS": "IT", "WIPRO.NS": "IT", "HCLTECH.NS": "IT", "TECHM.NS": "IT",
-            "RELIANCE.NS": "Oil & Gas", "ONGC.NS": "Oil & Gas", "IOC.NS": "Oil & Gas",
-            "HINDUNILVR.NS": "FMCG", "ITC.NS": "FMCG", "NESTLEIND.NS": "FMCG", "BRITANNIA.NS": "FMCG",
-            "MARUTI.NS": "Auto", "M&M.NS": "Auto", "TATAMOTORS.NS": "Auto", "BAJAJ-AUTO.NS": "Auto",
-            "SUNPHARMA.NS": "Pharma", "DRREDDY.NS": "Pharma", "CIPLA.NS": "Pharma", "LUPIN.NS": "Pharma",
-            "TATASTEEL.NS": "Metals", "HINDALCO.NS": "Metals", "JSWSTEEL.NS": "Metals", "VEDL.NS": "Metals",
-            "LT.NS": "Infrastructure", "UBL.NS": "Infrastructure", "GRASIM.NS": "Infrastructure",
-            "BHARTIARTL.NS": "Telecom", "IDEA.NS": "Telecom",
-            "NTPC.NS": "Power", "POWERGRID.NS": "Power", "TATAPOWER.NS": "Power",
-            "GOLDBEES.NS": "Gold", "SILVERBEES.NS": "Silver",
-            "NIFTYBEES.NS": "Index ETF", "JUNIORBEES.NS": "Index ETF"
-        }
-        
-        sector_allocation = {}
-        for symbol, weight in zip(symbols, weights):
-            sector = sector_mapping.get(symbol, "Other")
-            sector_allocation[sector] = sector_allocation.get(sector, 0) + weight * 100
-        
-        return sector_allocation
+        sectors = pd.Series(symbols).map(_SECTOR_MAPPING).fillna("Other")
+        weights_pct = pd.Series(weights, dtype=np.float64) * 100
+        return weights_pct.groupby(sectors, sort=False).sum().to_dict()
     
     def monte_carlo_simulation(
         self,
@@ -296,13 +336,20 @@ class BacktestingService:
         """
         
         # Get historical data to estimate parameters
-        returns_data = {}
-        for symbol in symbols:
+        def fetch_returns(symbol: str) -> Optional[np.ndarray]:
             try:
-                hist_data = data_service.get_historical_data(symbol, period="2y")
-                returns_data[symbol] = hist_data["returns"]
+                return _fetch_history(symbol, "2y")[2]
             except:
-                continue
+                return None
+        
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=min(16, len(symbols))) as executor:
+            futures = {executor.submit(fetch_returns, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                fetched[futures[future]] = future.result()
+        returns_data = {
+            symbol: fetched[symbol] for symbol in symbols if fetched[symbol] is not None
+        }
         
         if not returns_data:
             raise ValueError("Could not fetch sufficient data for simulation")
@@ -312,48 +359,68 @@ class BacktestingService:
         mean_returns = returns_df.mean().values
         cov_matrix = returns_df.cov().values
         
-        # Portfolio statistics
-        portfolio_mean = np.dot(weights, mean_returns)
-        portfolio_variance = np.dot(weights, np.dot(cov_matrix, weights))
+        # Portfolio statistics; the quadratic form is contracted in one pass
+        # without the intermediate cov @ w vector
+        weights_array = np.ascontiguousarray(weights, dtype=np.float64)
+        portfolio_mean = np.vdot(weights_array, mean_returns)
+        portfolio_variance = np.einsum('i,ij,j->', weights_array, cov_matrix, weights_array, optimize=True)
         portfolio_std = np.sqrt(portfolio_variance)
         
         # Convert to annual terms
         annual_mean = portfolio_mean * 252
         annual_std = portfolio_std * np.sqrt(252)
         
-        # Run simulations
-        simulation_results = []
+        # Draw correlated asset returns through the Cholesky factor of the
+        # covariance matrix; fall back to an eigen-decomposition when the
+        # sample covariance is only positive semi-definite
+        try:
+            cholesky_factor = np.linalg.cholesky(cov_matrix)
+        except np.linalg.LinAlgError:
+            eigenvalues, eigenvectors = np.linalg.eigh(cov_matrix)
+            cholesky_factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+        
+        # (mean + Z @ L.T) @ w == mean @ w + Z @ (L.T @ w), so fold the
+        # weights into the factor once instead of per draw
+        factor_loading = cholesky_factor.T @ weights_array
+        
+        # The jitted kernel streams each path across the worker threads without
+        # materializing the (paths, days, assets) tensor; the thread count is
+        # per calling thread in Numba, so set it on every request
+        available_threads = numba.config.NUMBA_NUM_THREADS
+        numba.set_num_threads(min(settings.MONTE_CARLO_THREADS or available_threads, available_threads))
         trading_days = time_horizon_years * 252
+        simulation_results = simulate_final_values(
+            float(portfolio_mean),
+            factor_loading,
+            num_simulations,
+            trading_days,
+            float(initial_investment)
+        )
         
-        for _ in range(num_simulations):
-            # Generate random returns
-            random_returns = np.random.normal(annual_mean / 252, annual_std / np.sqrt(252), trading_days)
-            
-            # Calculate cumulative value
-            cumulative_values = [initial_investment]
-            current_value = initial_investment
-            
-            for daily_return in random_returns:
-                current_value *= (1 + daily_return)
-                cumulative_values.append(current_value)
-            
-            simulation_results.append(cumulative_values[-1])  # Final value
+        # Calculate statistics; all percentiles come from a single partition
+        p5, p25, p50, p75, p95 = np.percentile(simulation_results, [5, 25, 50, 75, 95])
         
-        # Calculate statistics
-        simulation_results = np.array(simulation_results)
+        # Summarize the distribution as a histogram plus an evenly strided
+        # sample of at most ~500 paths rather than serializing every path
+        counts, bin_edges = np.histogram(simulation_results, bins=50)
+        sample_step = max(1, num_simulations // 500)
         
         return {
-            "final_values": simulation_results.tolist(),
+            "final_values": simulation_results[::sample_step].tolist(),
+            "distribution": {
+                "counts": counts.tolist(),
+                "bin_edges": bin_edges.tolist()
+            },
             "statistics": {
-                "mean_final_value": float(np.mean(simulation_results)),
-                "median_final_value": float(np.median(simulation_results)),
-                "std_final_value": float(np.std(simulation_results)),
-                "percentile_5": float(np.percentile(simulation_results, 5)),
-                "percentile_25": float(np.percentile(simulation_results, 25)),
-                "percentile_75": float(np.percentile(simulation_results, 75)),
-                "percentile_95": float(np.percentile(simulation_results, 95)),
-                "probability_of_loss": float(np.mean(simulation_results < initial_investment)),
-                "probability_of_doubling": float(np.mean(simulation_results >= 2 * initial_investment))
+                "mean_final_value": float(simulation_results.mean()),
+                "median_final_value": float(p50),
+                "std_final_value": float(simulation_results.std()),
+                "percentile_5": float(p5),
+                "percentile_25": float(p25),
+                "percentile_75": float(p75),
+                "percentile_95": float(p95),
+                "probability_of_loss": float((simulation_results < initial_investment).mean()),
+                "probability_of_doubling": float((simulation_results >= 2 * initial_investment).mean())
             },
             "parameters": {
                 "annual_expected_return": float(annual_mean),
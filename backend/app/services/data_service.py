@@ -1,67 +1,400 @@
+import logging
 import yfinance as yf
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, FrozenSet, Optional, Tuple
 from datetime import datetime, timedelta
+from pathlib import Path
 from app.config import settings
 from fastapi import HTTPException
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import functools
+import hashlib
+import os
+import threading
+from types import MappingProxyType
+import httpx
+import orjson
+from cachetools import TTLCache
+from requests import Session
+from requests_cache import CacheMixin, SQLiteCache
+from requests_ratelimiter import LimiterMixin, MemoryQueueBucket
+from pyrate_limiter import Duration, RequestRate, Limiter
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+logger = logging.getLogger(__name__)
+
+# Upstream fetches are I/O bound; this bounds concurrent requests to Yahoo
+MAX_FETCH_WORKERS = 8
+
+# Yahoo starts answering 429 somewhere between 65 and 100 symbols per batch,
+# so bulk calls are split into batches of at most this many
+MAX_BATCH_SYMBOLS = 50
+
+DEFAULT_SUFFIX = settings.DEFAULT_MARKET_SUFFIX
+EXCHANGE_SUFFIXES = ('.NS', '.BO')
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+
+# How far back each yfinance period reaches, for serving it from a longer
+# cached history; "max" has no fixed start
+_PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1), "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1), "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6), "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2), "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10)
+}
+
+# Trading days of synthetic history generated for each period
+_SYNTHETIC_DAYS = MappingProxyType({
+    "1d": 1, "5d": 5, "1mo": 30, "3mo": 90,
+    "6mo": 180, "1y": 252, "2y": 504, "5y": 1260,
+    "10y": 2520, "max": 2520
+})
+
+_SECTOR_SYMBOLS = MappingProxyType({
+    "Banking": ("HDFCBANK.NS", "ICICIBANK.NS", "SBIN.NS"),
+    "IT": ("TCS.NS", "INFY.NS", "WIPRO.NS"),
+    "Pharma": ("SUNPHARMA.NS", "DRREDDY.NS", "CIPLA.NS"),
+    "Auto": ("MARUTI.NS", "TATAMOTORS.NS", "M&M.NS"),
+    "FMCG": ("HINDUNILVR.NS", "ITC.NS", "NESTLEIND.NS")
+})
+_SECTOR_QUOTE_SYMBOLS = tuple(symbol for symbols in _SECTOR_SYMBOLS.values() for symbol in symbols)
+
+_INDICES = MappingProxyType({
+    "NIFTY_50": "^NSEI",
+    "SENSEX": "^BSESN",
+    "BANK_NIFTY": "^NSEBANK",
+    "FINNIFTY": "^CNXFIN",
+    "NIFTY_PHARMA": "^CNXPHARMA"
+})
+
+_POPULAR_SYMBOLS = tuple(settings.POPULAR_STOCKS + settings.POPULAR_ETFS)
+
+
+def _is_rate_limited(error: BaseException) -> bool:
+    """Whether Yahoo rejected a request with 429 Too Many Requests."""
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 429
+
+
+# Comprehensive list of Indian stocks and ETFs for symbol search, de-duplicated
+# in first-seen order, with upper-cased forms precomputed for matching
+_ALL_SYMBOLS = tuple(dict.fromkeys(
+    settings.POPULAR_STOCKS + 
+    settings.POPULAR_ETFS + 
+    [
+        # All Nifty 50 stocks
+        'ADANIENT.NS', 'ADANIPORTS.NS', 'APOLLOHOSP.NS', 'BAJAJ-AUTO.NS',
+        'BAJAJFINSV.NS', 'BRITANNIA.NS', 'CIPLA.NS', 'COALINDIA.NS',
+        'DIVISLAB.NS', 'DRREDDY.NS', 'EICHERMOT.NS', 'GRASIM.NS',
+        'HCLTECH.NS', 'HDFCLIFE.NS', 'HEROMOTOCO.NS', 'HINDALCO.NS',
+        'INDUSINDBK.NS', 'JSWSTEEL.NS', 'LTIM.NS', 'M&M.NS',
+        'NESTLEIND.NS', 'SBILIFE.NS', 'SHRIRAMFIN.NS', 'SUNPHARMA.NS',
+        'TATACONSUM.NS', 'TATAMOTORS.NS', 'TATASTEEL.NS', 'TRENT.NS',
+        'ULTRACEMCO.NS', 'UPL.NS', 'WIPRO.NS', 'TECHM.NS', 'MARUTI.NS',
+        'ASIANPAINT.NS', 'AXISBANK.NS', 'INFY.NS', 'ONGC.NS', 'POWERGRID.NS',
+        'NTPC.NS', 'BPCL.NS',
+        
+        # Banking stocks
+        'IDFCFIRSTB.NS', 'FEDERALBNK.NS', 'BANDHANBNK.NS', 'RBLBANK.NS',
+        'YESBANK.NS', 'PNB.NS', 'BANKBARODA.NS', 'CANBK.NS', 'UNIONBANK.NS',
+        'BANKINDIA.NS', 'CENTRALBK.NS', 'INDIANB.NS', 'IOB.NS', 'MAHABANK.NS',
+        'PSBANK.NS', 'SYNDIBANK.NS', 'UCO.NS', 'VIJAYABANK.NS',
+        
+        # IT stocks
+        'MINDTREE.NS', 'MPHASIS.NS', 'PERSISTENT.NS', 'COFORGE.NS',
+        'LTTS.NS', 'CYIENT.NS', 'HEXAWARE.NS', 'ZENSAR.NS', 'NIITTECH.NS',
+        'KPIT.NS', 'ROLTA.NS', 'SASKEN.NS', 'SUBEX.NS', 'TATAELXSI.NS',
+        '3IINFOTECH.NS', 'BIRLASOFT.NS', 'CEDRUS.NS', 'CMC.NS', 'DATAPATTNS.NS',
+        
+        # Pharma stocks
+        'BIOCON.NS', 'CADILAHC.NS', 'GLENMARK.NS', 'LUPIN.NS', 'TORNTPHARM.NS',
+        'AUROPHARMA.NS', 'REDDY.NS', 'ZYDUSLIFE.NS', 'LALPATHLAB.NS',
+        'METROPOLIS.NS', 'THYROCARE.NS', 'STAR.NS', 'SOLARA.NS',
+        
+        # Auto stocks
+        'MAHINDRA.NS', 'BAJAJ-AUTO.NS', 'TVSMOTORS.NS', 'ASHOKLEY.NS',
+        'ESCORTS.NS', 'FORCEMOT.NS', 'MRF.NS', 'APOLLOTYRE.NS', 'BALKRISIND.NS',
+        'CEAT.NS', 'JK.NS', 'MOTHERSUMI.NS', 'SUNDRMFAST.NS', 'SPARC.NS',
+        
+        # FMCG stocks
+        'GODREJCP.NS', 'MARICO.NS', 'DABUR.NS', 'COLPAL.NS', 'PIDILITIND.NS',
+        'GILLETTE.NS', 'VBLLEISURE.NS', 'JYOTHYLAB.NS', 'CHOLAFIN.NS',
+        
+        # Telecom stocks
+        'IDEA.NS', 'RCOM.NS', 'TTML.NS', 'GTPL.NS', 'HFCL.NS', 'STERLITE.NS',
+        
+        # Energy & Oil stocks
+        'HINDPETRO.NS', 'IOC.NS', 'GAIL.NS', 'OIL.NS', 'MRPL.NS', 'PETRONET.NS',
+        'GSPL.NS', 'IGL.NS', 'MGL.NS', 'AEGISCHEM.NS',
+        
+        # Metals & Mining
+        'SAIL.NS', 'NMDC.NS', 'VEDL.NS', 'JINDALSTEL.NS', 'WELCORP.NS',
+        'NATIONALUM.NS', 'HINDZINC.NS', 'RATNAMANI.NS', 'APL.NS',
+        
+        # Cement stocks
+        'ACC.NS', 'AMBUJACEMENT.NS', 'SHREECEM.NS', 'JKCEMENT.NS',
+        'RAMCOCEM.NS', 'HEIDELBERG.NS', 'ORIENT.NS', 'PRISM.NS',
+        
+        # Real Estate
+        'DLF.NS', 'BRIGADE.NS', 'GODREJPROP.NS', 'OBEROI.NS', 'PRESTIGE.NS',
+        'SOBHA.NS', 'UNITECH.NS', 'PHOENIX.NS',
+        
+        # Additional ETFs
+        'GOLDIETF.NS', 'SILVRETF.NS', 'LIQUIDBEES.NS', 'QNIFTY.NS',
+        'ICICINIFTY.NS', 'HDFCNIFTY.NS', 'SBIETF.NS', 'KOTAKNIFTY.NS',
+        'AXISBNKETF.NS', 'ICICIB22.NS', 'HDFCGOLD.NS', 'KOTAKGOLD.NS',
+        'ABSLNN50ET.NS', 'ABSLPSE.NS', 'ICICIMOM.NS', 'HDFCMOMENT.NS',
+        
+        # Mutual Fund ETFs
+        'HDFCSENSEX.NS', 'ICICISENSEX.NS', 'SBISENSEX.NS', 'KOTAKSENSEX.NS',
+        'AXISSENSEX.NS', 'RELBANK.NS', 'RELIANCEBNK.NS', 'ICICIBNK.NS',
+        
+        # Small & Mid Cap popular stocks
+        'DIXON.NS', 'IRCTC.NS', 'ZOMATO.NS', 'POLICYBZR.NS', 'PAYTM.NS',
+        'NYKAA.NS', 'FRESHWORKS.NS', 'SWIGGY.NS', 'EASEMYTRIP.NS',
+        'CARTRADE.NS', 'KRSNAA.NS', 'LATENTVIEW.NS', 'DEVYANI.NS',
+        'CLEAN.NS', 'GLAND.NS', 'MINDSPACE.NS', 'BROOKFIELD.NS',
+    ]
+))
+_ALL_SYMBOLS_UPPER = tuple(symbol.upper() for symbol in _ALL_SYMBOLS)
+_SYMBOL_POSITIONS = {symbol_upper: i for i, symbol_upper in enumerate(_ALL_SYMBOLS_UPPER)}
+
+
+def _build_ngram_index(symbols: Tuple[str, ...], max_n: int = 3) -> Dict[str, FrozenSet[int]]:
+    """Map every substring of up to ``max_n`` characters to the positions of the symbols containing it."""
+    index: Dict[str, set] = {}
+    for position, symbol in enumerate(symbols):
+        for n in range(1, max_n + 1):
+            for start in range(len(symbol) - n + 1):
+                index.setdefault(symbol[start:start + n], set()).add(position)
+    return {gram: frozenset(positions) for gram, positions in index.items()}
+
+
+_NGRAM_INDEX = _build_ngram_index(_ALL_SYMBOLS_UPPER)
+
+
+def _substring_matches(query_upper: str) -> List[int]:
+    """Positions of symbols containing ``query_upper``, in universe order.
+    
+    Candidates come from intersecting the posting sets of the query's
+    n-grams (trigrams, or the whole query when shorter) and are then
+    verified with a full substring check.
+    """
+    if not query_upper:
+        return list(range(len(_ALL_SYMBOLS_UPPER)))
+    
+    n = min(len(query_upper), 3)
+    postings = [
+        _NGRAM_INDEX.get(query_upper[start:start + n], frozenset())
+        for start in range(len(query_upper) - n + 1)
+    ]
+    candidates = frozenset.intersection(*postings)
+    return [position for position in sorted(candidates) if query_upper in _ALL_SYMBOLS_UPPER[position]]
+
+
+class CachedLimiterSession(CacheMixin, LimiterMixin, Session):
+    """HTTP session that caches Yahoo responses and throttles outgoing requests."""
 
 
 class MarketDataService:
     """Service for fetching and processing Indian market data."""
     
     def __init__(self):
-        self.cache = {}
         self.cache_duration = timedelta(minutes=settings.CACHE_DURATION_MINUTES)
+        # Bounded caches tiered by how fast each kind of data goes stale:
+        # quotes for a minute, price history for the configured duration and
+        # company info (name, sector, market cap, ...) for a day
+        self._quote_cache = TTLCache(maxsize=2048, ttl=60)
+        self._hist_cache = TTLCache(maxsize=2048, ttl=self.cache_duration.total_seconds())
+        self._info_cache = TTLCache(maxsize=4096, ttl=86400)
+        self._cache_lock = threading.Lock()
+        # Upstream fetches currently running, so concurrent identical requests
+        # share one Yahoo round-trip instead of each issuing their own
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+        # Shared by every yfinance call and built on first use (see _yahoo_session)
+        self._yf_session: Optional[CachedLimiterSession] = None
+        self._yf_session_lock = threading.Lock()
+        # Batched chart requests run on one background event loop, so a single
+        # keep-alive client is shared by every request thread. Both are started
+        # on the first chart fetch (see _chart_loop) so importing the module
+        # stays cheap, and released by close()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._chart_semaphore: Optional[asyncio.Semaphore] = None
+        self._loop_lock = threading.Lock()
+        # Daily bars are also persisted as Parquet so a restart does not
+        # refetch every symbol's full history
+        self._history_dir = Path(settings.HISTORY_CACHE_DIR)
+        self._history_cache_warned = False
+    
+    def _yahoo_session(self) -> CachedLimiterSession:
+        """The yfinance HTTP session, created on first use.
+        
+        Identical responses are served from the SQLite cache at
+        ``settings.YF_HTTP_CACHE_PATH`` and requests are queued to stay under
+        Yahoo's limits.
+        """
+        with self._yf_session_lock:
+            if self._yf_session is None:
+                self._yf_session = CachedLimiterSession(
+                    limiter=Limiter(
+                        RequestRate(settings.YF_REQUESTS_PER_MINUTE, Duration.MINUTE),
+                        RequestRate(settings.YF_REQUESTS_PER_HOUR, Duration.HOUR)
+                    ),
+                    bucket_class=MemoryQueueBucket,
+                    backend=SQLiteCache(settings.YF_HTTP_CACHE_PATH),
+                    expire_after=self.cache_duration
+                )
+            return self._yf_session
+    
+    def _chart_loop(self) -> asyncio.AbstractEventLoop:
+        """The background event loop for chart requests, started on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="yahoo-chart-loop", daemon=True)
+                self._loop_thread.start()
+                self._http_client = httpx.AsyncClient(
+                    headers={"User-Agent": "Mozilla/5.0"},
+                    timeout=10.0,
+                    limits=httpx.Limits(max_keepalive_connections=MAX_FETCH_WORKERS)
+                )
+                # Caps how many chart requests are in flight at once
+                self._chart_semaphore = asyncio.Semaphore(MAX_FETCH_WORKERS)
+            return self._loop
+    
+    def close(self) -> None:
+        """Close the chart HTTP client and stop its event loop, if started."""
+        with self._loop_lock:
+            if self._loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._http_client.aclose(), self._loop).result()
+            # Also stops the executor thread used for DNS lookups
+            asyncio.run_coroutine_threadsafe(self._loop.shutdown_default_executor(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+            self._loop = self._loop_thread = self._http_client = self._chart_semaphore = None
+    
+    def _cache_get(self, cache: TTLCache, key):
+        """Thread-safe cache read; returns None on a miss."""
+        with self._cache_lock:
+            return cache.get(key)
+    
+    def _cache_set(self, cache: TTLCache, key, value) -> None:
+        """Thread-safe cache write."""
+        with self._cache_lock:
+            cache[key] = value
+    
+    def _singleflight(self, key: tuple, fetch: Callable[[], Dict]) -> Dict:
+        """Run ``fetch`` once for concurrent callers sharing ``key``; the rest wait on its result."""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._inflight[key] = Future()
+        
+        if not is_leader:
+            return future.result()
+        
+        try:
+            result = fetch()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
     
-    def _is_cache_valid(self, symbol: str) -> bool:
-        """Check if cached data is still valid."""
-        if symbol not in self.cache:
-            return False
-        return datetime.now() - self.cache[symbol]["timestamp"] < self.cache_duration
+    def _get_info(self, symbol: str, ticker: yf.Ticker) -> Dict:
+        """Get the slow-changing company fields for a symbol."""
+        info = self._cache_get(self._info_cache, symbol)
+        if info is not None:
+            return info
+        
+        raw_info = ticker.info
+        info = {
+            "market_cap": raw_info.get("marketCap"),
+            "pe_ratio": raw_info.get("forwardPE"),
+            "company_name": raw_info.get("longName", symbol),
+            "sector": raw_info.get("sector", "Unknown"),
+            "industry": raw_info.get("industry", "Unknown")
+        }
+        self._cache_set(self._info_cache, symbol, info)
+        return info
 
     def get_stock_data(self, symbol: str) -> Dict:
         """Get current stock data for a symbol."""
-        # Ensure symbol has correct suffix for Indian stocks
-        if not symbol.endswith(('.NS', '.BO')) and not symbol.startswith('^'):
-            symbol = f"{symbol}{settings.DEFAULT_MARKET_SUFFIX}"
+        symbol = self._normalize_symbol(symbol)
         
         # Check cache first
-        if self._is_cache_valid(symbol):
-            return self.cache[symbol]["data"]
+        data = self._cache_get(self._quote_cache, symbol)
+        if data is not None:
+            return data
         
+        return self._singleflight(("quote", symbol), lambda: self._fetch_stock_data(symbol))
+    
+    def get_stock_quote(self, symbol: str) -> Dict:
+        """Get price-only data for a symbol, skipping the company info lookup."""
+        symbol = self._normalize_symbol(symbol)
+        
+        # A cached full quote already carries every price field
+        data = self._cache_get(self._quote_cache, symbol) or self._cache_get(self._quote_cache, ("price", symbol))
+        if data is not None:
+            return data
+        
+        return self._singleflight(("price", symbol), lambda: self._fetch_stock_quote(symbol))
+    
+    def _price_fields(self, symbol: str, hist: pd.DataFrame) -> Dict:
+        """Price, change and volume from the last two daily bars."""
+        if hist.empty:
+            raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
+        
+        current_price = hist['Close'].iloc[-1]
+        prev_price = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
+        change = current_price - prev_price
+        change_percent = (change / prev_price) * 100 if prev_price != 0 else 0
+        
+        return {
+            "symbol": symbol,
+            "current_price": float(current_price),
+            "change": float(change),
+            "change_percent": float(change_percent),
+            "volume": int(hist['Volume'].iloc[-1]) if not hist['Volume'].isna().iloc[-1] else 0
+        }
+    
+    def _fetch_stock_quote(self, symbol: str) -> Dict:
+        """Fetch price-only data from Yahoo and cache it."""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            hist = ticker.history(period="2d")
+            ticker = yf.Ticker(symbol, session=self._yahoo_session())
+            data = self._price_fields(symbol, ticker.history(period="2d"))
+            data["last_updated"] = datetime.now().isoformat()
             
-            if hist.empty:
-                raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
+            self._cache_set(self._quote_cache, ("price", symbol), data)
             
-            current_price = hist['Close'].iloc[-1]
-            prev_price = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-            change = current_price - prev_price
-            change_percent = (change / prev_price) * 100 if prev_price != 0 else 0
+            return data
             
-            data = {
-                "symbol": symbol,
-                "current_price": float(current_price),
-                "change": float(change),
-                "change_percent": float(change_percent),
-                "volume": int(hist['Volume'].iloc[-1]) if not hist['Volume'].isna().iloc[-1] else 0,
-                "market_cap": info.get("marketCap"),
-                "pe_ratio": info.get("forwardPE"),
-                "company_name": info.get("longName", symbol),
-                "sector": info.get("sector", "Unknown"),
-                "industry": info.get("industry", "Unknown"),
-                "last_updated": datetime.now().isoformat()
-            }
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error fetching data for {symbol}: {str(e)}")
+    
+    def _fetch_stock_data(self, symbol: str) -> Dict:
+        """Fetch a quote from Yahoo and cache it."""
+        try:
+            ticker = yf.Ticker(symbol, session=self._yahoo_session())
+            data = self._price_fields(symbol, ticker.history(period="2d"))
+            data.update(self._get_info(symbol, ticker))
+            data["last_updated"] = datetime.now().isoformat()
             
             # Cache the result
-            self.cache[symbol] = {
-                "data": data,
-                "timestamp": datetime.now()
-            }
+            self._cache_set(self._quote_cache, symbol, data)
             
             return data
             
@@ -69,79 +402,198 @@ class MarketDataService:
             raise HTTPException(status_code=400, detail=f"Error fetching data for {symbol}: {str(e)}")
 
     def get_historical_data(self, symbol: str, period: str = "1y", interval: str = "1d") -> Dict:
-        """Get historical data for a symbol."""
-        import time
-        import random
+        """Get historical data for a symbol.
+        
+        Price, volume and return series are read-only NumPy arrays shared
+        through the cache; dates are ``YYYY-MM-DD`` strings.
+        """
+        logger.debug("get_historical_data called with symbol=%s, period=%s, interval=%s", symbol, period, interval)
         
-        print(f"DEBUG: get_historical_data called with symbol={symbol}, period={period}, interval={interval}")
+        symbol = self._normalize_symbol(symbol)
         
-        # Ensure symbol has correct suffix
-        if not symbol.endswith(('.NS', '.BO')) and not symbol.startswith('^'):
-            symbol = f"{symbol}{settings.DEFAULT_MARKET_SUFFIX}"
+        cache_key = (symbol, period, interval)
+        data = self._cache_get(self._hist_cache, cache_key)
+        if data is not None:
+            return data
         
-        # Add small random delay to avoid rate limiting
-        time.sleep(random.uniform(0.1, 0.5))
+        def fetch() -> Dict:
+            data = self._fetch_historical_data(symbol, period, interval)
+            for key, value in data.items():
+                if isinstance(value, np.ndarray):
+                    data[key] = value = np.ascontiguousarray(value)
+                    value.flags.writeable = False
+            self._cache_set(self._hist_cache, cache_key, data)
+            return data
         
+        return self._singleflight(("hist", symbol, period, interval), fetch)
+    
+    def _fetch_historical_data(self, symbol: str, period: str, interval: str) -> Dict:
+        """Fetch historical data from Yahoo, falling back to synthetic data."""
         try:
-            # Try with session for better reliability
-            ticker = yf.Ticker(symbol)
-            
-            # First try a shorter period if the requested period is long
-            test_period = "5d" if period in ["1y", "2y", "5y", "10y", "max"] else period
-            hist = ticker.history(period=test_period, interval=interval)
+            ticker = yf.Ticker(symbol, session=self._yahoo_session())
+            hist = self._load_history(ticker, symbol, period, interval)
             
-            # If short period works and we need longer data, try the original period
-            if not hist.empty and test_period != period:
-                try:
-                    hist = ticker.history(period=period, interval=interval)
-                except Exception as e:
-                    print(f"DEBUG: Fallback to shorter period due to: {str(e)}")
-                    # Keep the working short period data
-                    pass
+            # Drop bars without a usable close so downstream analytics can
+            # assume finite prices and returns
+            hist = hist[np.isfinite(hist['Close'])]
             
             if hist.empty:
-                # Try alternative methods
-                print(f"DEBUG: No data with period={period}, trying 1mo")
-                hist = ticker.history(period="1mo", interval=interval)
-                
-            if hist.empty:
-                raise HTTPException(status_code=404, detail=f"No historical data found for symbol {symbol} (tried multiple periods)")
+                raise HTTPException(status_code=404, detail=f"No valid price data found for symbol {symbol}")
             
             # Calculate returns
-            hist['Returns'] = hist['Close'].pct_change()
+            hist['Returns'] = hist['Close'].pct_change().replace([np.inf, -np.inf], np.nan)
             
             return {
                 "symbol": symbol,
                 "dates": [date.strftime("%Y-%m-%d") for date in hist.index],
-                "prices": hist['Close'].tolist(),
-                "volumes": hist['Volume'].tolist(),
-                "returns": hist['Returns'].fillna(0).tolist(),
-                "high": hist['High'].tolist(),
-                "low": hist['Low'].tolist(),
-                "open": hist['Open'].tolist()
+                "prices": hist['Close'].to_numpy(dtype=np.float64),
+                "volumes": hist['Volume'].to_numpy(dtype=np.int64),
+                "returns": hist['Returns'].fillna(0).to_numpy(dtype=np.float64),
+                "high": hist['High'].to_numpy(dtype=np.float64),
+                "low": hist['Low'].to_numpy(dtype=np.float64),
+                "open": hist['Open'].to_numpy(dtype=np.float64)
             }
             
         except Exception as e:
-            print(f"DEBUG: Exception in get_historical_data: {str(e)}")
+            logger.debug("Exception in get_historical_data: %s", e)
             # Generate fallback synthetic data for demonstration
-            print(f"DEBUG: Generating synthetic data for {symbol}")
+            logger.debug("Generating synthetic data for %s", symbol)
             return self._generate_synthetic_data(symbol, period)
     
+    def _load_history(self, ticker: yf.Ticker, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        """Daily bars from the Parquet cache, fetching only what it is missing.
+        
+        A fresh file covering ``period`` is served as is; a stale one is
+        extended with the bars since its last date. Intraday intervals, and
+        periods the file does not reach back to, are downloaded in full.
+        """
+        if interval.endswith(('m', 'h')):
+            return self._download_history(ticker, symbol, period, interval)[0]
+        
+        path = self._history_dir / f"{symbol}_{interval}.parquet"
+        start = self._period_start(period)
+        try:
+            cached = pd.read_parquet(path)
+        except FileNotFoundError:
+            cached = None
+        except Exception as e:
+            self._history_cache_failed("Could not read history cache %s: %s", path, e)
+            cached = None
+        
+        if cached is not None and not cached.empty and (
+            cached.attrs.get("period") == "max" if start is None else cached.index[0] <= start + pd.Timedelta(days=7)
+        ):
+            hist = cached
+            age = datetime.now().timestamp() - path.stat().st_mtime
+            if age > self.cache_duration.total_seconds():
+                try:
+                    tail = ticker.history(start=cached.index[-1].strftime("%Y-%m-%d"), interval=interval)
+                except Exception as e:
+                    logger.debug("Could not extend cached history for %s: %s", symbol, e)
+                    tail = pd.DataFrame()
+                if not tail.empty:
+                    hist = pd.concat([cached, self._as_daily(tail)])
+                    hist = hist[~hist.index.duplicated(keep='last')]
+                    hist.attrs = cached.attrs
+                self._store_history(path, hist)
+        else:
+            hist, fetched_period = self._download_history(ticker, symbol, period, interval)
+            hist = self._as_daily(hist)
+            if cached is not None and not cached.empty:
+                # Keep the older bars the previous file already had
+                hist = pd.concat([cached[cached.index < hist.index[0]], hist])
+            hist.attrs = {"period": fetched_period}
+            self._store_history(path, hist)
+        
+        return hist if start is None else hist[hist.index >= start]
+    
+    def _store_history(self, path: Path, hist: pd.DataFrame) -> None:
+        """Write bars to the Parquet cache; a failed write only costs a refetch later.
+        
+        The file is written next to its destination and then renamed over it,
+        so a concurrent reader or a crash mid-write never sees a partial file.
+        """
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            hist.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            self._history_cache_failed("Could not write history cache %s: %s", path, e)
+    
+    def _history_cache_failed(self, msg: str, *args) -> None:
+        """Log a history cache failure: a warning the first time, debug after that."""
+        level = logging.DEBUG if self._history_cache_warned else logging.WARNING
+        self._history_cache_warned = True
+        logger.log(level, msg, *args)
+    
+    @staticmethod
+    def _as_daily(hist: pd.DataFrame) -> pd.DataFrame:
+        """OHLCV columns indexed by naive calendar dates."""
+        hist = hist[['Open', 'High', 'Low', 'Close', 'Volume']].copy()
+        if hist.index.tz is not None:
+            hist.index = hist.index.tz_localize(None)
+        hist.index = hist.index.normalize()
+        return hist
+    
+    @staticmethod
+    def _period_start(period: str) -> Optional[pd.Timestamp]:
+        """First date a yfinance ``period`` covers, or None for "max"."""
+        today = pd.Timestamp.now().normalize()
+        if period == "ytd":
+            return today.replace(month=1, day=1)
+        return today - _PERIOD_OFFSETS.get(period, _PERIOD_OFFSETS["1y"]) if period != "max" else None
+    
+    def _download_history(self, ticker: yf.Ticker, symbol: str, period: str, interval: str) -> Tuple[pd.DataFrame, str]:
+        """Download bars from Yahoo, stepping down to shorter periods when needed.
+        
+        Returns the bars and the period they were actually fetched for.
+        """
+        # First try a shorter period if the requested period is long
+        test_period = "5d" if period in ["1y", "2y", "5y", "10y", "max"] else period
+        hist = ticker.history(period=test_period, interval=interval)
+        fetched_period = test_period
+        
+        # If short period works and we need longer data, try the original period
+        if not hist.empty and test_period != period:
+            try:
+                hist = ticker.history(period=period, interval=interval)
+                fetched_period = period
+            except Exception as e:
+                logger.debug("Fallback to shorter period due to: %s", e)
+                # Keep the working short period data
+                pass
+        
+        if hist.empty:
+            # Try alternative methods
+            logger.debug("No data with period=%s, trying 1mo", period)
+            hist = ticker.history(period="1mo", interval=interval)
+            fetched_period = "1mo"
+            
+        if hist.empty:
+            raise HTTPException(status_code=404, detail=f"No historical data found for symbol {symbol} (tried multiple periods)")
+        
+        return hist, fetched_period
+    
     def _generate_synthetic_data(self, symbol: str, period: str = "1y") -> Dict:
         """Generate realistic synthetic historical data when API fails."""
-        import random
-        import math
-        
-        # Set seed based on symbol for reproducible data
-        random.seed(hash(symbol) % 1000)
+        # The series only changes with the day it ends on, so memoize per day
+        data = self._synthetic_history(symbol, period, pd.Timestamp.now().normalize())
+        return {**data, "dates": list(data["dates"])}
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _synthetic_history(symbol: str, period: str, end: pd.Timestamp) -> Dict:
+        """Synthetic series ending on ``end``, with read-only arrays safe to share."""
+        # Seed a private generator per symbol for reproducible data; the global
+        # one is shared between threads fetching several symbols concurrently.
+        # blake2s keeps the seed stable across processes, unlike hash()
+        seed = int(hashlib.blake2s(symbol.encode(), digest_size=4).hexdigest(), 16)
+        rng = np.random.default_rng(seed)
         
         # Determine number of days based on period
-        days_map = {
-            "1d": 1, "5d": 5, "1mo": 30, "3mo": 90,
-            "6mo": 180, "1y": 252, "2y": 504, "5y": 1260,
-            "10y": 2520, "max": 2520
-        }
-        days = days_map.get(period, 252)
+        days = _SYNTHETIC_DAYS.get(period, 252)
         
         # Generate base parameters based on symbol type
         if symbol.startswith('^'):  # Index
@@ -170,154 +622,279 @@ class MarketDataService:
             volatility = 0.18
             trend = 0.08
         
-        # Generate dates
-        from datetime import datetime, timedelta
-        end_date = datetime.now()
-        dates = []
-        prices = []
-        volumes = []
-        returns = []
-        
-        current_price = base_price
-        
-        for i in range(days):
-            date = end_date - timedelta(days=days-i-1)
-            # Skip weekends for trading days
-            while date.weekday() >= 5:
-                date += timedelta(days=1)
-            
-            dates.append(date.strftime("%Y-%m-%d"))
-            
-            # Generate price with trend and volatility
-            daily_return = random.gauss(trend/252, volatility/math.sqrt(252))
-            current_price *= (1 + daily_return)
-            prices.append(round(current_price, 2))
-            
-            # Generate volume
-            base_volume = 100000 if symbol.startswith('^') else 10000
-            volume = int(random.gauss(base_volume, base_volume * 0.3))
-            volumes.append(max(volume, 1000))
-            
-            returns.append(daily_return)
+        # Generate trading dates: the last ``days`` business days up to today
+        dates = tuple(pd.bdate_range(end=end, periods=days).strftime("%Y-%m-%d"))
         
-        # First return is always 0
+        # Generate prices with trend and volatility; the first return is always 0
+        returns = rng.normal(trend / 252, volatility / np.sqrt(252), days)
         returns[0] = 0.0
+        prices = np.round(base_price * np.cumprod(1.0 + returns), 2)
         
-        return {
+        # Generate volume
+        base_volume = 100000 if symbol.startswith('^') else 10000
+        volumes = np.maximum(rng.normal(base_volume, base_volume * 0.3, days).astype(int), 1000)
+        
+        data = {
             "symbol": symbol,
             "dates": dates,
             "prices": prices,
-            "volumes": volumes,
+            "volumes": volumes.astype(np.int64),
             "returns": returns,
-            "high": [p * random.uniform(1.0, 1.02) for p in prices],
-            "low": [p * random.uniform(0.98, 1.0) for p in prices],
-            "open": [p * random.uniform(0.99, 1.01) for p in prices]
+            "high": prices * rng.uniform(1.0, 1.02, days),
+            "low": prices * rng.uniform(0.98, 1.0, days),
+            "open": prices * rng.uniform(0.99, 1.01, days)
         }
+        for value in data.values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+        return data
     
     def get_multiple_stocks_data(self, symbols: List[str]) -> Dict[str, Dict]:
-        """Get data for multiple stocks."""
-        results = {}
-        for symbol in symbols:
+        """Get data for multiple stocks, fetching each distinct ticker once."""
+        tickers = {symbol: self._normalize_symbol(symbol) for symbol in symbols}
+        fetched = {}
+        for batch in self._batches(list(dict.fromkeys(tickers.values()))):
+            fetched.update(self._fetch_concurrently(self.get_stock_data, batch))
+        return {symbol: fetched[ticker] for symbol, ticker in tickers.items()}
+    
+    def _fetch_concurrently(self, fetch: Callable[[str], Dict], symbols: List[str]) -> Dict[str, Dict]:
+        """Run ``fetch`` for every symbol on the thread pool, reporting failures as error entries."""
+        def fetch_one(symbol: str) -> Dict:
             try:
-                results[symbol] = self.get_stock_data(symbol)
+                return fetch(symbol)
             except Exception as e:
-                results[symbol] = {"error": str(e)}
-        return results
+                return {"error": str(e)}
+        
+        with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+            return dict(zip(symbols, executor.map(fetch_one, symbols)))
     
-    def get_correlation_matrix(self, symbols: List[str], period: str = "1y") -> pd.DataFrame:
-        """Get correlation matrix for multiple symbols."""
-        price_data = {}
+    @staticmethod
+    def _batches(symbols: List[str]) -> List[List[str]]:
+        """Split ``symbols`` into consecutive batches of at most MAX_BATCH_SYMBOLS."""
+        return [symbols[i:i + MAX_BATCH_SYMBOLS] for i in range(0, len(symbols), MAX_BATCH_SYMBOLS)]
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _normalize_symbol(symbol: str) -> str:
+        """Canonical Yahoo ticker: upper-cased, with the default exchange suffix on bare stocks.
+        
+        Every cache is keyed by this form, so ``tcs``, ``TCS`` and ``TCS.NS``
+        share one entry.
+        """
+        symbol = symbol.strip().upper()
+        if not symbol.endswith(EXCHANGE_SUFFIXES) and not symbol.startswith('^'):
+            return f"{symbol}{DEFAULT_SUFFIX}"
+        return symbol
+    
+    def _download_bars(self, tickers: List[str], period: str, interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """Download OHLCV bars for several tickers concurrently.
+        
+        Returns one frame per ticker, keeping only bars with a finite close;
+        tickers Yahoo returned nothing for are left out.
+        """
+        bars = {}
+        loop = self._chart_loop()
+        for batch in self._batches(list(dict.fromkeys(tickers))):
+            results = asyncio.run_coroutine_threadsafe(
+                self._fetch_charts(batch, period, interval), loop
+            ).result()
+            
+            for ticker, frame in zip(batch, results):
+                if isinstance(frame, Exception):
+                    logger.debug("Chart fetch failed for %s: %s", ticker, frame)
+                    continue
+                frame = frame[np.isfinite(frame['Close'])]
+                if not frame.empty:
+                    bars[ticker] = frame
+        return bars
+    
+    async def _fetch_charts(self, tickers: List[str], range_: str, interval: str) -> List:
+        """Fetch every ticker's chart at once, returning exceptions in place of failures."""
+        return await asyncio.gather(
+            *(self._fetch_chart(ticker, range_, interval) for ticker in tickers),
+            return_exceptions=True
+        )
+    
+    @retry(
+        retry=retry_if_exception(_is_rate_limited),
+        wait=wait_random_exponential(multiplier=1, max=30),
+        stop=stop_after_attempt(5),
+        reraise=True
+    )
+    async def _fetch_chart(self, symbol: str, range_: str, interval: str) -> pd.DataFrame:
+        """OHLCV bars from Yahoo's chart endpoint, adjusted for splits and dividends."""
+        async with self._chart_semaphore:
+            response = await self._http_client.get(
+                YAHOO_CHART_URL.format(symbol=symbol),
+                params={"range": range_, "interval": interval, "events": "div,splits"}
+            )
+        response.raise_for_status()
+        
+        result = orjson.loads(response.content)["chart"]["result"][0]
+        quote = result["indicators"]["quote"][0]
+        index = pd.to_datetime(result["timestamp"], unit="s", utc=True)
+        index = index.tz_convert(result["meta"]["exchangeTimezoneName"]).tz_localize(None)
+        if not interval.endswith(('m', 'h')):
+            index = index.normalize()
+        
+        bars = pd.DataFrame({
+            "Open": quote["open"],
+            "High": quote["high"],
+            "Low": quote["low"],
+            "Close": quote["close"],
+            "Volume": quote["volume"]
+        }, index=index, dtype=np.float64)
+        
+        # Scale OHLC by the adjusted close, like yfinance's auto_adjust
+        adjclose = result["indicators"].get("adjclose")
+        if adjclose:
+            factor = np.asarray(adjclose[0]["adjclose"], dtype=np.float64) / bars["Close"].to_numpy()
+            bars[["Open", "High", "Low", "Close"]] = bars[["Open", "High", "Low", "Close"]].mul(factor, axis=0)
+        
+        # The live bar can share a date with the last daily close; keep the latest
+        return bars[~bars.index.duplicated(keep='last')]
+    
+    def _download_many(self, symbols: List[str], period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+        """Download closing prices for several symbols concurrently.
+        
+        Returns a date-indexed frame with one column per requested symbol;
+        symbols Yahoo returned no prices for are left out.
+        """
+        tickers = [self._normalize_symbol(symbol) for symbol in symbols]
+        bars = self._download_bars(tickers, period, interval)
+        return pd.DataFrame({
+            symbol: bars[ticker]['Close'] for symbol, ticker in zip(symbols, tickers) if ticker in bars
+        })
+    
+    def get_stock_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Get price-only data for several symbols with one batched history request.
+        
+        Symbols the batch returns nothing for are retried one by one; any that
+        still fail map to an error entry.
+        """
+        tickers = {symbol: self._normalize_symbol(symbol) for symbol in symbols}
+        
+        quotes = {}
+        for symbol, ticker in tickers.items():
+            cached = self._cache_get(self._quote_cache, ticker) or self._cache_get(self._quote_cache, ("price", ticker))
+            if cached is not None:
+                quotes[symbol] = cached
+        
+        missing = [symbol for symbol in tickers if symbol not in quotes]
+        if missing:
+            bars = self._download_bars([tickers[symbol] for symbol in missing], period="2d")
+            fetched_at = datetime.now().isoformat()
+            for symbol in missing:
+                ticker = tickers[symbol]
+                if ticker in bars:
+                    data = self._price_fields(ticker, bars[ticker])
+                    data["last_updated"] = fetched_at
+                    self._cache_set(self._quote_cache, ("price", ticker), data)
+                    quotes[symbol] = data
+            
+            retry = [symbol for symbol in missing if symbol not in quotes]
+            if retry:
+                quotes.update(self._fetch_concurrently(self.get_stock_quote, retry))
+        
+        return {symbol: quotes[symbol] for symbol in symbols}
+    
+    def _fetch_history_series(self, symbols: List[str], period: str) -> Dict[str, Tuple[pd.Series, pd.Series]]:
+        """Get date-indexed (prices, returns) per symbol, batching the download.
         
-        for symbol in symbols:
+        Symbols missing from the batch go through ``get_historical_data``
+        concurrently so they still get its retries and synthetic fallback;
+        symbols that fail entirely are skipped.
+        """
+        closes = self._download_many(symbols, period)
+        
+        series = {}
+        for symbol in closes.columns:
+            prices = closes[symbol].dropna()
+            series[symbol] = (prices, prices.pct_change().fillna(0))
+        
+        def fetch(symbol: str) -> Optional[Tuple[pd.Series, pd.Series]]:
             try:
                 hist_data = self.get_historical_data(symbol, period)
-                price_data[symbol] = hist_data["prices"]
             except:
-                continue
+                return None
+            dates = pd.to_datetime(hist_data["dates"])
+            first = ~dates.duplicated(keep='first')
+            return (
+                pd.Series(hist_data["prices"], index=dates)[first],
+                pd.Series(hist_data["returns"], index=dates)[first]
+            )
+        
+        missing = [symbol for symbol in symbols if symbol not in series]
+        if missing:
+            with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+                for symbol, fetched in zip(missing, executor.map(fetch, missing)):
+                    if fetched is not None:
+                        series[symbol] = fetched
+        
+        return {symbol: series[symbol] for symbol in symbols if symbol in series}
+    
+    def get_correlation_matrix(self, symbols: List[str], period: str = "1y") -> pd.DataFrame:
+        """Get the correlation matrix of daily returns for multiple symbols."""
+        history = self._fetch_history_series(symbols, period)
         
-        if len(price_data) < 2:
+        if len(history) < 2:
             raise HTTPException(status_code=400, detail="Need at least 2 valid symbols for correlation")
         
-        df = pd.DataFrame(price_data)
-        return df.corr()
+        # Correlate returns (not price levels) over the dates every symbol traded
+        prices = pd.DataFrame({symbol: prices for symbol, (prices, _) in history.items()}).dropna()
+        returns = prices.to_numpy()
+        returns = returns[1:] / returns[:-1] - 1.0
+        return pd.DataFrame(np.corrcoef(returns, rowvar=False), index=prices.columns, columns=prices.columns)
     
     def get_returns_matrix(self, symbols: List[str], period: str = "1y") -> pd.DataFrame:
         """Get returns matrix for multiple symbols."""
-        returns_data = {}
-        
-        for symbol in symbols:
-            try:
-                hist_data = self.get_historical_data(symbol, period)
-                returns_data[symbol] = hist_data["returns"]
-            except:
-                continue
+        history = self._fetch_history_series(symbols, period)
         
-        if len(returns_data) < 1:
+        if len(history) < 1:
             raise HTTPException(status_code=400, detail="Need at least 1 valid symbol for returns")
         
-        return pd.DataFrame(returns_data)
+        # Align on the dates every symbol traded; rows stay positional as before
+        df = pd.DataFrame({symbol: returns for symbol, (_, returns) in history.items()})
+        return df.dropna().reset_index(drop=True)
     
     def get_sector_data(self) -> List[Dict]:
         """Get sector-wise performance data."""
-        sector_symbols = {
-            "Banking": ["HDFCBANK.NS", "ICICIBANK.NS", "SBIN.NS"],
-            "IT": ["TCS.NS", "INFY.NS", "WIPRO.NS"],
-            "Pharma": ["SUNPHARMA.NS", "DRREDDY.NS", "CIPLA.NS"],
-            "Auto": ["MARUTI.NS", "TATAMOTORS.NS", "M&M.NS"],
-            "FMCG": ["HINDUNILVR.NS", "ITC.NS", "NESTLEIND.NS"]
-        }
+        # Fetch every sector's quotes in one batch
+        quotes = self.get_stock_quotes(list(_SECTOR_QUOTE_SYMBOLS))
         
         sector_data = []
-        for sector, symbols in sector_symbols.items():
-            try:
-                sector_performance = []
-                for symbol in symbols:
-                    try:
-                        stock_data = self.get_stock_data(symbol)
-                        sector_performance.append(stock_data["change_percent"])
-                    except:
-                        continue
-                
-                if sector_performance:
-                    avg_performance = sum(sector_performance) / len(sector_performance)
-                    sector_data.append({
-                        "sector": sector,
-                        "performance": avg_performance,
-                        "count": len(sector_performance)
-                    })
-            except:
-                continue
+        for sector, symbols in _SECTOR_SYMBOLS.items():
+            total = 0.0
+            count = 0
+            for symbol in symbols:
+                if "error" not in quotes[symbol]:
+                    total += quotes[symbol]["change_percent"]
+                    count += 1
+            
+            if count:
+                sector_data.append({
+                    "sector": sector,
+                    "performance": total / count,
+                    "count": count
+                })
         
         return sector_data
     
     def get_market_indices(self) -> Dict[str, Dict]:
         """Get data for major Indian market indices."""
-        indices = {
-            "NIFTY_50": "^NSEI",
-            "SENSEX": "^BSESN",
-            "BANK_NIFTY": "^NSEBANK",
-            "FINNIFTY": "^CNXFIN",
-            "NIFTY_PHARMA": "^CNXPHARMA"
+        quotes = self.get_stock_quotes(list(_INDICES.values()))
+        return {
+            name: {"error": "Data not available"} if "error" in quotes[symbol] else quotes[symbol]
+            for name, symbol in _INDICES.items()
         }
-        
-        indices_data = {}
-        for name, symbol in indices.items():
-            try:
-                indices_data[name] = self.get_stock_data(symbol)
-            except:
-                indices_data[name] = {"error": "Data not available"}
-        
-        return indices_data
     
     def search_stocks(self, query: str, limit: int = 10) -> List[Dict]:
         """Search for stocks by name or symbol."""
         # This is a simple implementation - in production, you'd use a proper search index
-        popular_stocks = settings.POPULAR_STOCKS + settings.POPULAR_ETFS
-        
         results = []
         query = query.upper()
         
-        for symbol in popular_stocks:
+        for symbol in _POPULAR_SYMBOLS:
             if query in symbol.upper():
                 try:
                     stock_data = self.get_stock_data(symbol)
@@ -331,111 +908,26 @@ class MarketDataService:
     
     def search_symbols(self, query: str, limit: int = 50) -> List[str]:
         """Search for stock symbols (lightweight version)."""
-        from app.config import settings
-        
-        # Comprehensive list of Indian stocks and ETFs
-        all_symbols = (
-            settings.POPULAR_STOCKS + 
-            settings.POPULAR_ETFS + 
-            [
-                # All Nifty 50 stocks
-                'ADANIENT.NS', 'ADANIPORTS.NS', 'APOLLOHOSP.NS', 'BAJAJ-AUTO.NS',
-                'BAJAJFINSV.NS', 'BRITANNIA.NS', 'CIPLA.NS', 'COALINDIA.NS',
-                'DIVISLAB.NS', 'DRREDDY.NS', 'EICHERMOT.NS', 'GRASIM.NS',
-                'HCLTECH.NS', 'HDFCLIFE.NS', 'HEROMOTOCO.NS', 'HINDALCO.NS',
-                'INDUSINDBK.NS', 'JSWSTEEL.NS', 'LTIM.NS', 'M&M.NS',
-                'NESTLEIND.NS', 'SBILIFE.NS', 'SHRIRAMFIN.NS', 'SUNPHARMA.NS',
-                'TATACONSUM.NS', 'TATAMOTORS.NS', 'TATASTEEL.NS', 'TRENT.NS',
-                'ULTRACEMCO.NS', 'UPL.NS', 'WIPRO.NS', 'TECHM.NS', 'MARUTI.NS',
-                'ASIANPAINT.NS', 'AXISBANK.NS', 'INFY.NS', 'ONGC.NS', 'POWERGRID.NS',
-                'NTPC.NS', 'BPCL.NS',
-                
-                # Banking stocks
-                'IDFCFIRSTB.NS', 'FEDERALBNK.NS', 'BANDHANBNK.NS', 'RBLBANK.NS',
-                'YESBANK.NS', 'PNB.NS', 'BANKBARODA.NS', 'CANBK.NS', 'UNIONBANK.NS',
-                'BANKINDIA.NS', 'CENTRALBK.NS', 'INDIANB.NS', 'IOB.NS', 'MAHABANK.NS',
-                'PSBANK.NS', 'SYNDIBANK.NS', 'UCO.NS', 'VIJAYABANK.NS',
-                
-                # IT stocks
-                'MINDTREE.NS', 'MPHASIS.NS', 'PERSISTENT.NS', 'COFORGE.NS',
-                'LTTS.NS', 'CYIENT.NS', 'HEXAWARE.NS', 'ZENSAR.NS', 'NIITTECH.NS',
-                'KPIT.NS', 'ROLTA.NS', 'SASKEN.NS', 'SUBEX.NS', 'TATAELXSI.NS',
-                '3IINFOTECH.NS', 'BIRLASOFT.NS', 'CEDRUS.NS', 'CMC.NS', 'DATAPATTNS.NS',
-                
-                # Pharma stocks
-                'BIOCON.NS', 'CADILAHC.NS', 'GLENMARK.NS', 'LUPIN.NS', 'TORNTPHARM.NS',
-                'AUROPHARMA.NS', 'REDDY.NS', 'ZYDUSLIFE.NS', 'LALPATHLAB.NS',
-                'METROPOLIS.NS', 'THYROCARE.NS', 'STAR.NS', 'SOLARA.NS',
-                
-                # Auto stocks
-                'MAHINDRA.NS', 'BAJAJ-AUTO.NS', 'TVSMOTORS.NS', 'ASHOKLEY.NS',
-                'ESCORTS.NS', 'FORCEMOT.NS', 'MRF.NS', 'APOLLOTYRE.NS', 'BALKRISIND.NS',
-                'CEAT.NS', 'JK.NS', 'MOTHERSUMI.NS', 'SUNDRMFAST.NS', 'SPARC.NS',
-                
-                # FMCG stocks
-                'GODREJCP.NS', 'MARICO.NS', 'DABUR.NS', 'COLPAL.NS', 'PIDILITIND.NS',
-                'GILLETTE.NS', 'VBLLEISURE.NS', 'JYOTHYLAB.NS', 'CHOLAFIN.NS',
-                
-                # Telecom stocks
-                'IDEA.NS', 'RCOM.NS', 'TTML.NS', 'GTPL.NS', 'HFCL.NS', 'STERLITE.NS',
-                
-                # Energy & Oil stocks
-                'HINDPETRO.NS', 'IOC.NS', 'GAIL.NS', 'OIL.NS', 'MRPL.NS', 'PETRONET.NS',
-                'GSPL.NS', 'IGL.NS', 'MGL.NS', 'AEGISCHEM.NS',
-                
-                # Metals & Mining
-                'SAIL.NS', 'NMDC.NS', 'VEDL.NS', 'JINDALSTEL.NS', 'WELCORP.NS',
-                'NATIONALUM.NS', 'HINDZINC.NS', 'RATNAMANI.NS', 'APL.NS',
-                
-                # Cement stocks
-                'ACC.NS', 'AMBUJACEMENT.NS', 'SHREECEM.NS', 'JKCEMENT.NS',
-                'RAMCOCEM.NS', 'HEIDELBERG.NS', 'ORIENT.NS', 'PRISM.NS',
-                
-                # Real Estate
-                'DLF.NS', 'BRIGADE.NS', 'GODREJPROP.NS', 'OBEROI.NS', 'PRESTIGE.NS',
-                'SOBHA.NS', 'UNITECH.NS', 'PHOENIX.NS',
-                
-                # Additional ETFs
-                'GOLDIETF.NS', 'SILVRETF.NS', 'LIQUIDBEES.NS', 'QNIFTY.NS',
-                'ICICINIFTY.NS', 'HDFCNIFTY.NS', 'SBIETF.NS', 'KOTAKNIFTY.NS',
-                'AXISBNKETF.NS', 'ICICIB22.NS', 'HDFCGOLD.NS', 'KOTAKGOLD.NS',
-                'ABSLNN50ET.NS', 'ABSLPSE.NS', 'ICICIMOM.NS', 'HDFCMOMENT.NS',
-                
-                # Mutual Fund ETFs
-                'HDFCSENSEX.NS', 'ICICISENSEX.NS', 'SBISENSEX.NS', 'KOTAKSENSEX.NS',
-                'AXISSENSEX.NS', 'RELBANK.NS', 'RELIANCEBNK.NS', 'ICICIBNK.NS',
-                
-                # Small & Mid Cap popular stocks
-                'DIXON.NS', 'IRCTC.NS', 'ZOMATO.NS', 'POLICYBZR.NS', 'PAYTM.NS',
-                'NYKAA.NS', 'FRESHWORKS.NS', 'SWIGGY.NS', 'EASEMYTRIP.NS',
-                'CARTRADE.NS', 'KRSNAA.NS', 'LATENTVIEW.NS', 'DEVYANI.NS',
-                'CLEAN.NS', 'GLAND.NS', 'MINDSPACE.NS', 'BROOKFIELD.NS',
-            ]
-        )
-        
         results = []
+        seen = set()
         query_upper = query.upper()
         
         # First add exact matches
-        for symbol in all_symbols:
-            if symbol.upper() == query_upper or symbol.upper() == f"{query_upper}.NS":
-                results.append(symbol)
+        exact_positions = sorted(
+            _SYMBOL_POSITIONS[match] for match in (query_upper, f"{query_upper}.NS") if match in _SYMBOL_POSITIONS
+        )
+        for position in exact_positions:
+            results.append(_ALL_SYMBOLS[position])
+            seen.add(position)
         
         # Then add partial matches
-        for symbol in all_symbols:
-            if query_upper in symbol.upper() and symbol not in results:
-                results.append(symbol)
+        for position in _substring_matches(query_upper):
+            if position not in seen:
+                results.append(_ALL_SYMBOLS[position])
+                seen.add(position)
                 if len(results) >= limit:
                     break
         
-        # If still no results, try adding .NS suffix to the query
-        if not results and not query.endswith('.NS'):
-            query_with_suffix = f"{query}.NS"
-            for symbol in all_symbols:
-                if symbol.upper() == query_with_suffix.upper():
-                    results.append(symbol)
-                    break
-        
         # If still no results and query looks like a valid symbol, suggest it with .NS
         if not results and len(query) >= 3 and query.isalpha():
             suggested_symbol = f"{query.upper()}.NS"
@@ -443,6 +935,5 @@ class MarketDataService:
         
         return results
 
-
 # Create a single instance to be used throughout the application
 data_service = MarketDataService()
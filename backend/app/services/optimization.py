@@ -1,71 +1,137 @@
 import numpy as np
 import pandas as pd
 from typing import List, Dict, Optional, Tuple
+from scipy.linalg import LinAlgError, cho_factor, cho_solve
+from scipy.linalg.blas import dsyrk
 from scipy.optimize import minimize
+from scipy.stats import qmc
 from app.services.data_service import data_service
+from app.services import _opt_kernels as kernels
 from app.models.schemas import OptimizationType, RiskTolerance
 from app.config import settings
+from cachetools import LRUCache, TTLCache, cached
+import threading
 import warnings
 warnings.filterwarnings('ignore')
 
+
+@cached(TTLCache(maxsize=128, ttl=settings.CACHE_DURATION_MINUTES * 60), lock=threading.Lock())
+def _load_prices(symbols: Tuple[str, ...], period: str) -> pd.DataFrame:
+    """Aligned price panel for a sorted symbol tuple, shared by repeated optimizations."""
+    # Get historical data for all symbols
+    prices_data = {}
+    
+    for symbol in symbols:
+        try:
+            hist_data = data_service.get_historical_data(symbol, period)
+            # Index by date: each symbol's history has had its own bad bars
+            # dropped, so positions do not line up across symbols
+            prices_data[symbol] = pd.Series(hist_data["prices"], index=pd.DatetimeIndex(hist_data["dates"]))
+        except Exception as e:
+            print(f"Warning: Could not fetch data for {symbol}: {e}")
+            continue
+    
+    # If no real data is available, generate mock data for testing
+    if not prices_data:
+        print("No real data available, generating mock data for testing...")
+        np.random.seed(42)  # For reproducible results
+        dates = pd.date_range(end=pd.Timestamp.now(), periods=252, freq='D')
+        
+        for symbol in symbols:
+            # Generate realistic stock price data
+            initial_price = np.random.uniform(100, 2000)  # Random starting price
+            returns = np.random.normal(0.0008, 0.02, 252)  # Daily returns with realistic volatility
+            returns[0] = 0.0  # First day is the starting price
+            prices_data[symbol] = pd.Series(initial_price * np.cumprod(1.0 + returns), index=dates)
+    
+    if not prices_data:
+        raise ValueError("No valid price data found for any symbol")
+    
+    # Align on dates, keeping only the days every symbol has a price for
+    prices_df = pd.DataFrame(prices_data)
+    prices_df = prices_df.dropna()
+    
+    if len(prices_df) < 30:  # Need at least 30 data points
+        raise ValueError("Insufficient data for optimization")
+    
+    return prices_df
+
+
 class PortfolioOptimizer:
     """Portfolio optimization service with multiple models."""
     
     def __init__(self):
         self.risk_free_rate = settings.RISK_FREE_RATE
+        # Last solution per (symbols, optimizer, period), used as the next
+        # solve's starting point since rebalances re-solve near-identical problems
+        self._solution_cache = LRUCache(maxsize=256)
+        self._solution_lock = threading.Lock()
+        # Annualized (mu, cov) per (symbols, period), shared by every method
+        # run over the same universe; expires with the underlying prices
+        self._moments_cache = TTLCache(maxsize=128, ttl=settings.CACHE_DURATION_MINUTES * 60)
+        self._moments_lock = threading.Lock()
+    
+    def _initial_weights(self, key: Tuple, symbols: List[str], use_warmstart: bool) -> np.ndarray:
+        """Previous solution for ``key`` in ``symbols`` order, or equal weights."""
+        n_assets = len(symbols)
+        if use_warmstart:
+            with self._solution_lock:
+                previous = self._solution_cache.get(key)
+            if previous is not None:
+                return np.array([previous[symbol] for symbol in symbols])
+        return np.array([1.0 / n_assets] * n_assets)
+    
+    def _store_solution(self, key: Tuple, symbols: List[str], weights: np.ndarray) -> None:
+        """Remember converged weights as the warm start for ``key``."""
+        with self._solution_lock:
+            self._solution_cache[key] = dict(zip(symbols, weights))
     
     def _prepare_data(self, symbols: List[str], period: str = "1y") -> Tuple[pd.DataFrame, pd.DataFrame]:
-        """Prepare price data and returns for optimization."""
-        # Get historical data for all symbols
-        prices_data = {}
+        """Prepare price data and returns for optimization, in ``symbols`` order."""
+        prices_df = _load_prices(tuple(sorted(set(symbols))), period)
         
-        for symbol in symbols:
-            try:
-                hist_data = data_service.get_historical_data(symbol, period)
-                prices_data[symbol] = hist_data["prices"]
-            except Exception as e:
-                print(f"Warning: Could not fetch data for {symbol}: {e}")
-                continue
-        
-        # If no real data is available, generate mock data for testing
-        if not prices_data:
-            print("No real data available, generating mock data for testing...")
-            np.random.seed(42)  # For reproducible results
-            dates = pd.date_range(end=pd.Timestamp.now(), periods=252, freq='D')
-            
-            for symbol in symbols:
-                # Generate realistic stock price data
-                initial_price = np.random.uniform(100, 2000)  # Random starting price
-                returns = np.random.normal(0.0008, 0.02, 252)  # Daily returns with realistic volatility
-                prices = [initial_price]
-                
-                for ret in returns[1:]:
-                    prices.append(prices[-1] * (1 + ret))
-                
-                prices_data[symbol] = prices
-        
-        if not prices_data:
-            raise ValueError("No valid price data found for any symbol")
-        
-        # Create DataFrame with aligned dates
-        prices_df = pd.DataFrame(prices_data)
-        prices_df = prices_df.dropna()
-        
-        if len(prices_df) < 30:  # Need at least 30 data points
-            raise ValueError("Insufficient data for optimization")
-        
-        # Calculate returns
-        returns_df = prices_df.pct_change().dropna()
+        # Callers index weights by position, so restore their column order
+        columns = list(dict.fromkeys(symbol for symbol in symbols if symbol in prices_df.columns))
+        prices_df = prices_df[columns]
+        
+        # Calculate returns by slicing; prices are already NaN-free, so this
+        # matches pct_change().dropna() without the intermediate frames
+        prices = prices_df.to_numpy(dtype=np.float64)
+        returns_df = pd.DataFrame(prices[1:] / prices[:-1] - 1.0, index=prices_df.index[1:], columns=prices_df.columns)
         
         return prices_df, returns_df
     
-    def _calculate_expected_returns(self, returns_df: pd.DataFrame) -> pd.Series:
-        """Calculate expected returns using historical mean."""
-        return returns_df.mean() * 252  # Annualized
+    def _prepare_arrays(self, symbols: List[str], period: str = "1y") -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Annualized expected returns and covariance as C-contiguous float64 arrays.
+        
+        The optimizers' inner loops work on these directly; pandas is only
+        needed to fetch and align the prices. Results are cached and shared
+        between calls, so callers must copy before modifying them.
+        """
+        key = (tuple(symbols), period)
+        with self._moments_lock:
+            moments = self._moments_cache.get(key)
+        if moments is not None:
+            return moments
+        
+        prices_df, returns_df = self._prepare_data(symbols, period)
+        returns = returns_df.to_numpy(dtype=np.float64)
+        mu_arr = np.ascontiguousarray(returns.mean(axis=0) * 252)  # Annualized historical mean
+        cov_arr = self._annualized_covariance(returns)
+        moments = (mu_arr, cov_arr, list(returns_df.columns))
+        with self._moments_lock:
+            self._moments_cache[key] = moments
+        return moments
     
-    def _calculate_covariance_matrix(self, returns_df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate covariance matrix."""
-        return returns_df.cov() * 252  # Annualized
+    @staticmethod
+    def _annualized_covariance(returns: np.ndarray) -> np.ndarray:
+        """Annualized sample covariance of a (T, n) returns array."""
+        # Sample covariance as one BLAS symmetric rank-k update on the centered
+        # returns, folding the 1/(T-1) and annualization into alpha
+        centered = np.asfortranarray(returns - returns.mean(axis=0))
+        upper = dsyrk(alpha=252.0 / (len(centered) - 1), a=centered, trans=1)
+        cov = upper + np.triu(upper, 1).T  # dsyrk only fills the upper triangle
+        return cov.T  # Symmetric, so the transpose is the same matrix in C order
     
     def _get_risk_aversion_factor(self, risk_tolerance: RiskTolerance) -> float:
         """Get risk aversion factor based on risk tolerance."""
@@ -76,10 +142,19 @@ class PortfolioOptimizer:
         }
         return risk_factors.get(risk_tolerance, 5.0)
     
-    def _portfolio_performance(self, weights: np.ndarray, returns: pd.Series, cov_matrix: pd.DataFrame) -> Tuple[float, float, float]:
+    @staticmethod
+    def _cholesky(cov_arr: np.ndarray) -> Optional[Tuple[np.ndarray, bool]]:
+        """Cholesky factor of Σ for ``cho_solve``, or None if Σ is not positive definite."""
+        try:
+            return cho_factor(cov_arr, lower=True)
+        except LinAlgError:
+            return None
+    
+    def _portfolio_performance(self, weights: np.ndarray, returns: np.ndarray, cov_matrix: np.ndarray) -> Tuple[float, float, float]:
         """Calculate portfolio performance metrics."""
         portfolio_return = np.dot(weights, returns)
-        portfolio_volatility = np.sqrt(np.dot(weights, np.dot(cov_matrix, weights)))
+        # w^T Σ w in the compiled kernel, without einsum's per-call dispatch
+        portfolio_volatility = np.sqrt(kernels.variance(weights, cov_matrix))
         sharpe_ratio = (portfolio_return - self.risk_free_rate) / portfolio_volatility if portfolio_volatility > 0 else 0
         return portfolio_return, portfolio_volatility, sharpe_ratio
     
@@ -88,51 +163,57 @@ class PortfolioOptimizer:
         symbols: List[str], 
         risk_tolerance: RiskTolerance = RiskTolerance.MODERATE,
         target_return: Optional[float] = None,
-        period: str = "1y"
+        period: str = "1y",
+        mu: Optional[np.ndarray] = None,
+        cov_matrix: Optional[np.ndarray] = None,
+        use_warmstart: bool = True
     ) -> Dict:
-        """Perform mean-variance optimization."""
-        prices_df, returns_df = self._prepare_data(symbols, period)
+        """Perform mean-variance optimization.
         
-        # Calculate expected returns and covariance matrix
-        mu = self._calculate_expected_returns(returns_df)
-        cov_matrix = self._calculate_covariance_matrix(returns_df)
+        Callers that already estimated ``mu`` and ``cov_matrix`` (e.g. with
+        views blended in) can pass them to skip fetching and re-estimating.
+        """
+        if mu is None or cov_matrix is None:
+            # Calculate expected returns and covariance matrix
+            mu_arr, cov_arr, _ = self._prepare_arrays(symbols, period)
+        else:
+            mu_arr = np.ascontiguousarray(mu, dtype=np.float64)
+            cov_arr = np.ascontiguousarray(cov_matrix, dtype=np.float64)
         
         n_assets = len(symbols)
         
-        # Objective function: minimize negative Sharpe ratio or portfolio variance
-        def objective(weights):
-            portfolio_return = np.dot(weights, mu)
-            portfolio_vol = np.sqrt(np.dot(weights, np.dot(cov_matrix, weights)))
-            
-            if target_return:
-                # Minimize variance for target return
-                return portfolio_vol ** 2
-            else:
-                # Maximize Sharpe ratio (minimize negative Sharpe)
-                if portfolio_vol == 0:
-                    return 1e6
-                return -(portfolio_return - self.risk_free_rate) / portfolio_vol
+        # Objective function: minimize portfolio variance for a target return,
+        # otherwise maximize the Sharpe ratio (minimize its negative)
+        if target_return:
+            objective = lambda w: kernels.variance(w, cov_arr)
+            objective_grad = lambda w: kernels.variance_grad(w, cov_arr)
+        else:
+            objective = lambda w: kernels.negative_sharpe(w, mu_arr, cov_arr, self.risk_free_rate)
+            objective_grad = lambda w: kernels.negative_sharpe_grad(w, mu_arr, cov_arr, self.risk_free_rate)
         
         # Constraints
-        constraints = [{'type': 'eq', 'fun': lambda x: np.sum(x) - 1.0}]
+        constraints = [{'type': 'eq', 'fun': lambda x: np.sum(x) - 1.0, 'jac': lambda x: np.ones(n_assets)}]
         
         if target_return:
             constraints.append({
                 'type': 'eq', 
-                'fun': lambda x: np.dot(x, mu) - target_return
+                'fun': lambda x: np.dot(x, mu_arr) - target_return,
+                'jac': lambda x: mu_arr
             })
         
         # Bounds (no short selling)
         bounds = [(0.0, 1.0) for _ in range(n_assets)]
         
-        # Initial guess (equal weights)
-        x0 = np.array([1.0 / n_assets] * n_assets)
+        # Initial guess (previous solution, else equal weights)
+        warmstart_key = (frozenset(symbols), "mean_variance", period)
+        x0 = self._initial_weights(warmstart_key, symbols, use_warmstart)
         
         # Optimize
         result = minimize(
             objective,
             x0,
             method='SLSQP',
+            jac=objective_grad,
             bounds=bounds,
             constraints=constraints,
             options={'maxiter': 1000}
@@ -140,9 +221,10 @@ class PortfolioOptimizer:
         
         if not result.success:
             raise ValueError("Optimization failed to converge")
+        self._store_solution(warmstart_key, symbols, result.x)
         
         # Calculate performance
-        port_return, port_vol, sharpe = self._portfolio_performance(result.x, mu, cov_matrix)
+        port_return, port_vol, sharpe = self._portfolio_performance(result.x, mu_arr, cov_arr)
         
         return {
             "symbols": symbols,
@@ -162,42 +244,30 @@ class PortfolioOptimizer:
         self,
         symbols: List[str],
         period: str = "1y",
+        use_warmstart: bool = True,
         **kwargs  # Accept and ignore additional parameters
     ) -> Dict:
         """Perform risk parity optimization."""
-        prices_df, returns_df = self._prepare_data(symbols, period)
-        
-        # Calculate covariance matrix
-        cov_matrix = self._calculate_covariance_matrix(returns_df)
+        # Calculate expected returns and covariance matrix
+        mu_arr, cov_arr, _ = self._prepare_arrays(symbols, period)
         
         # Risk parity optimization
         n_assets = len(symbols)
         
-        def risk_parity_objective(weights):
-            """Objective function for risk parity."""
-            portfolio_vol = np.sqrt(np.dot(weights, np.dot(cov_matrix, weights)))
-            if portfolio_vol == 0:
-                return 1e6
-            
-            marginal_contribs = np.dot(cov_matrix, weights) / portfolio_vol
-            contrib = weights * marginal_contribs
-            
-            # Minimize sum of squared differences from equal risk contribution
-            target_contrib = 1.0 / n_assets
-            return np.sum((contrib / np.sum(contrib) - target_contrib) ** 2)
-        
         # Constraints and bounds
-        constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1.0}
+        constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1.0, 'jac': lambda x: np.ones(n_assets)}
         bounds = [(0.01, 1.0) for _ in range(n_assets)]  # Minimum 1% allocation
         
-        # Initial guess (equal weights)
-        x0 = np.array([1.0 / n_assets] * n_assets)
+        # Initial guess (previous solution, else equal weights)
+        warmstart_key = (frozenset(symbols), "risk_parity", period)
+        x0 = self._initial_weights(warmstart_key, symbols, use_warmstart)
         
-        # Optimize
+        # Optimize: minimize sum of squared differences from equal risk contribution
         result = minimize(
-            risk_parity_objective,
+            lambda w: kernels.risk_parity_objective(w, cov_arr),
             x0,
             method='SLSQP',
+            jac=lambda w: kernels.risk_parity_grad(w, cov_arr),
             bounds=bounds,
             constraints=constraints,
             options={'maxiter': 1000}
@@ -205,10 +275,10 @@ class PortfolioOptimizer:
         
         if not result.success:
             raise ValueError("Risk parity optimization failed to converge")
+        self._store_solution(warmstart_key, symbols, result.x)
         
         # Calculate portfolio performance
-        mu = self._calculate_expected_returns(returns_df)
-        port_return, port_vol, sharpe = self._portfolio_performance(result.x, mu, cov_matrix)
+        port_return, port_vol, sharpe = self._portfolio_performance(result.x, mu_arr, cov_arr)
         
         return {
             "symbols": symbols,
@@ -227,32 +297,59 @@ class PortfolioOptimizer:
         self,
         symbols: List[str],
         period: str = "1y",
+        use_warmstart: bool = True,
         **kwargs  # Accept and ignore additional parameters
     ) -> Dict:
         """Perform minimum variance optimization."""
-        prices_df, returns_df = self._prepare_data(symbols, period)
-        
-        # Calculate covariance matrix
-        cov_matrix = self._calculate_covariance_matrix(returns_df)
+        # Calculate expected returns and covariance matrix
+        mu_arr, cov_arr, _ = self._prepare_arrays(symbols, period)
         
         n_assets = len(symbols)
         
-        # Objective function: minimize portfolio variance
-        def objective(weights):
-            return np.dot(weights, np.dot(cov_matrix, weights))
+        # Without the no-short-selling bounds the solution is closed form,
+        # w = Σ^-1 1 / (1^T Σ^-1 1), from one Cholesky solve; it is only used
+        # when it already satisfies the bounds
+        weights = None
+        factor = self._cholesky(cov_arr)
+        if factor is not None:
+            inv_ones = cho_solve(factor, np.ones(n_assets))
+            weights = inv_ones / inv_ones.sum()
+        
+        if weights is None or not np.all(weights >= 0):
+            warmstart_key = (frozenset(symbols), "minimum_variance", period)
+            x0 = self._initial_weights(warmstart_key, symbols, use_warmstart)
+            weights = self._minimum_variance_slsqp(cov_arr, x0)
+            self._store_solution(warmstart_key, symbols, weights)
+        
+        # Calculate performance
+        port_return, port_vol, sharpe = self._portfolio_performance(weights, mu_arr, cov_arr)
+        
+        return {
+            "symbols": symbols,
+            "weights": [float(w) for w in weights],
+            "expected_return": float(port_return),
+            "expected_volatility": float(port_vol),
+            "sharpe_ratio": float(sharpe),
+            "optimization_type": "minimum_variance",
+            "metadata": {
+                "period": str(period)
+            }
+        }
+    
+    def _minimum_variance_slsqp(self, cov_arr: np.ndarray, x0: np.ndarray) -> np.ndarray:
+        """Long-only minimum variance weights via SLSQP, starting from ``x0``."""
+        n_assets = len(x0)
         
         # Constraints
-        constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1.0}
+        constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1.0, 'jac': lambda x: np.ones(n_assets)}
         bounds = [(0.0, 1.0) for _ in range(n_assets)]
         
-        # Initial guess
-        x0 = np.array([1.0 / n_assets] * n_assets)
-        
-        # Optimize
+        # Optimize: minimize portfolio variance
         result = minimize(
-            objective,
+            lambda w: kernels.variance(w, cov_arr),
             x0,
             method='SLSQP',
+            jac=lambda w: kernels.variance_grad(w, cov_arr),
             bounds=bounds,
             constraints=constraints,
             options={'maxiter': 1000}
@@ -261,21 +358,7 @@ class PortfolioOptimizer:
         if not result.success:
             raise ValueError("Minimum variance optimization failed to converge")
         
-        # Calculate performance
-        mu = self._calculate_expected_returns(returns_df)
-        port_return, port_vol, sharpe = self._portfolio_performance(result.x, mu, cov_matrix)
-        
-        return {
-            "symbols": symbols,
-            "weights": [float(w) for w in result.x],
-            "expected_return": float(port_return),
-            "expected_volatility": float(port_vol),
-            "sharpe_ratio": float(sharpe),
-            "optimization_type": "minimum_variance",
-            "metadata": {
-                "period": str(period)
-            }
-        }
+        return result.x
     
     def black_litterman_optimization(
         self,
@@ -287,42 +370,41 @@ class PortfolioOptimizer:
         period: str = "1y"
     ) -> Dict:
         """Perform simplified Black-Litterman optimization."""
-        prices_df, returns_df = self._prepare_data(symbols, period)
+        # Use historical returns as expected returns (simplified approach)
+        mu_arr, cov_arr, _ = self._prepare_arrays(symbols, period)
         
         # Get market capitalizations if not provided
         if not market_caps:
+            # Fetched concurrently; failed lookups come back as error entries
             market_caps = {}
-            for symbol in symbols:
-                try:
-                    stock_data = data_service.get_stock_data(symbol)
-                    if stock_data.get("market_cap"):
-                        market_caps[symbol] = stock_data["market_cap"]
-                except:
+            for symbol, stock_data in data_service.get_multiple_stocks_data(symbols).items():
+                if "error" in stock_data:
                     # Use equal weights if market cap not available
                     market_caps[symbol] = 1.0
+                elif stock_data.get("market_cap"):
+                    market_caps[symbol] = stock_data["market_cap"]
         
         # Calculate market-cap weighted portfolio as prior
         total_market_cap = sum(market_caps.values())
         prior_weights = np.array([market_caps.get(symbol, 1.0)/total_market_cap for symbol in symbols])
         
-        # Use historical returns as expected returns (simplified approach)
-        mu = self._calculate_expected_returns(returns_df)
-        cov_matrix = self._calculate_covariance_matrix(returns_df)
-        
-        # Apply views if provided (simplified)
+        # Apply views if provided (simplified), on a copy of the cached returns
         if views:
+            mu_arr = mu_arr.copy()
             for symbol, view_return in views.items():
                 if symbol in symbols:
                     idx = symbols.index(symbol)
                     confidence = view_confidences.get(symbol, 0.5) if view_confidences else 0.5
                     # Blend historical return with view
-                    mu.iloc[idx] = (1 - confidence) * mu.iloc[idx] + confidence * view_return
+                    mu_arr[idx] = (1 - confidence) * mu_arr[idx] + confidence * view_return
         
         # Optimize using mean-variance with adjusted returns
         return self.mean_variance_optimization(
             symbols=symbols,
             risk_tolerance=risk_tolerance,
-            period=period
+            period=period,
+            mu=mu_arr,
+            cov_matrix=cov_arr
         )
     
     def monte_carlo_optimization(
@@ -330,7 +412,7 @@ class PortfolioOptimizer:
         symbols: List[str],
         risk_tolerance: RiskTolerance = RiskTolerance.MODERATE,
         period: str = "1y",
-        num_portfolios: int = 10000,
+        num_portfolios: int = 1024,
         **kwargs
     ) -> Dict:
         """
@@ -340,9 +422,7 @@ class PortfolioOptimizer:
         print(f"Starting Monte Carlo optimization for {len(symbols)} assets with {num_portfolios} simulations...")
         
         # Prepare data
-        prices, returns = self._prepare_data(symbols, period)
-        mu = returns.mean() * 252  # Annualized returns
-        cov_matrix = returns.cov() * 252  # Annualized covariance
+        mu_arr, cov_arr, _ = self._prepare_arrays(symbols, period)
         
         n_assets = len(symbols)
         
@@ -354,39 +434,34 @@ class PortfolioOptimizer:
         }
         target_sharpe = risk_tolerance_map.get(risk_tolerance, 0.8)
         
-        # Storage for results
+        # Generate every random portfolio at once from a scrambled Sobol
+        # sequence (seeded for reproducible results); -log(U) normalized per
+        # row is uniform on the simplex, and the low-discrepancy points cover
+        # it far more evenly than pseudo-random draws. Sobol's balance
+        # properties only hold for power-of-2 sample sizes, so the requested
+        # count is rounded up to the next power of 2 and every point is kept
+        print("Generating random portfolios...")
+        sampler = qmc.Sobol(d=n_assets, scramble=True, seed=42)
+        m = int(np.ceil(np.log2(max(num_portfolios, 1))))
+        weights = -np.log(sampler.random_base2(m=m) + 1e-12)
+        num_portfolios = weights.shape[0]
+        weights /= weights.sum(axis=1, keepdims=True)  # Normalize rows to sum to 1
+        
+        # Batched performance: w @ mu and w^T Σ w for every row, in parallel.
+        # Ranking does not need double precision, so the batch runs in float32
+        # (twice the SIMD width, half the memory traffic)
+        weights = weights.astype(np.float32)
+        portfolio_returns, portfolio_vols, sharpe_ratios = kernels.portfolio_stats(
+            weights, mu_arr.astype(np.float32), cov_arr.astype(np.float32), np.float32(self.risk_free_rate)
+        )
+        
         results = {
-            'weights': [],
-            'returns': [],
-            'volatilities': [],
-            'sharpe_ratios': []
+            'weights': weights,
+            'returns': portfolio_returns,
+            'volatilities': portfolio_vols,
+            'sharpe_ratios': sharpe_ratios
         }
         
-        # Set random seed for reproducible results
-        np.random.seed(42)
-        
-        # Generate random portfolios
-        print("Generating random portfolios...")
-        for i in range(num_portfolios):
-            # Generate random weights
-            weights = np.random.random(n_assets)
-            weights = weights / np.sum(weights)  # Normalize to sum to 1
-            
-            # Calculate portfolio performance
-            port_return, port_vol, sharpe = self._portfolio_performance(weights, mu, cov_matrix)
-            
-            # Store results
-            results['weights'].append(weights)
-            results['returns'].append(port_return)
-            results['volatilities'].append(port_vol)
-            results['sharpe_ratios'].append(sharpe)
-        
-        # Convert to numpy arrays for easier manipulation
-        results['weights'] = np.array(results['weights'])
-        results['returns'] = np.array(results['returns'])
-        results['volatilities'] = np.array(results['volatilities'])
-        results['sharpe_ratios'] = np.array(results['sharpe_ratios'])
-        
         print(f"Generated {num_portfolios} portfolios")
         print(f"Sharpe ratios range: {results['sharpe_ratios'].min():.3f} to {results['sharpe_ratios'].max():.3f}")
         
@@ -395,8 +470,7 @@ class PortfolioOptimizer:
             # Conservative: Minimize volatility while maintaining reasonable return
             valid_returns = results['returns'] > 0.05  # At least 5% return
             if np.any(valid_returns):
-                conservative_indices = np.where(valid_returns)[0]
-                best_idx = conservative_indices[np.argmin(results['volatilities'][conservative_indices])]
+                best_idx = np.argmin(np.where(valid_returns, results['volatilities'], np.inf))
             else:
                 best_idx = np.argmin(results['volatilities'])
         
@@ -406,24 +480,23 @@ class PortfolioOptimizer:
         
         else:  # MODERATE
             # Moderate: Balance between return and risk
-            # Find portfolios with Sharpe ratio above median
-            median_sharpe = np.median(results['sharpe_ratios'])
-            good_sharpe_indices = np.where(results['sharpe_ratios'] >= median_sharpe)[0]
+            # Find portfolios with Sharpe ratio above median; the two middle
+            # order statistics come from one O(N) partition instead of a sort
+            middle = [(num_portfolios - 1) // 2, num_portfolios // 2]
+            median_sharpe = np.partition(results['sharpe_ratios'], middle)[middle].mean()
+            good_sharpe = results['sharpe_ratios'] >= median_sharpe
             
-            if len(good_sharpe_indices) > 0:
+            if np.any(good_sharpe):
                 # Among good Sharpe ratios, find the one closest to target volatility (15%)
                 target_vol = 0.15
-                vol_differences = np.abs(results['volatilities'][good_sharpe_indices] - target_vol)
-                best_among_good = good_sharpe_indices[np.argmin(vol_differences)]
-                best_idx = best_among_good
+                score = np.where(good_sharpe, -np.abs(results['volatilities'] - target_vol), -np.inf)
+                best_idx = np.argmax(score)
             else:
                 best_idx = np.argmax(results['sharpe_ratios'])
         
-        # Get the best portfolio
-        best_weights = results['weights'][best_idx]
-        best_return = results['returns'][best_idx]
-        best_volatility = results['volatilities'][best_idx]
-        best_sharpe = results['sharpe_ratios'][best_idx]
+        # Get the best portfolio, re-evaluated in float64 for the response
+        best_weights = results['weights'][best_idx].astype(np.float64)
+        best_return, best_volatility, best_sharpe = self._portfolio_performance(best_weights, mu_arr, cov_arr)
         
         print(f"Selected portfolio (index {best_idx}):")
         print(f"  Expected Return: {best_return:.1%}")
@@ -466,6 +539,31 @@ class PortfolioOptimizer:
         
         return optimization_methods[optimization_type](symbols, **kwargs)
     
+    def optimize_batch(
+        self,
+        symbols: List[str],
+        method_kwargs: Dict[OptimizationType, Dict],
+        period: str = "1y"
+    ) -> Dict[str, Dict]:
+        """Run several optimization methods over the same symbols and period.
+        
+        Prices and moments are loaded once up front and shared by every
+        method. A method that fails is reported under ``errors`` rather than
+        failing the whole batch.
+        """
+        self._prepare_arrays(symbols, period)
+        
+        results, errors = {}, {}
+        for optimization_type, kwargs in method_kwargs.items():
+            try:
+                results[optimization_type.value] = self.optimize_portfolio(
+                    symbols, optimization_type, period=period, **kwargs
+                )
+            except ValueError as e:
+                errors[optimization_type.value] = str(e)
+        
+        return {"results": results, "errors": errors}
+    
     def suggest_asset_allocation(
         self,
         risk_tolerance: RiskTolerance,
@@ -0,0 +1,44 @@
+import pytest
+from pathlib import Path
+
+# Universe shared by the optimizer tests in this directory
+OPTIMIZER_TEST_SYMBOLS = ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"]
+
+
+@pytest.fixture(scope="session")
+def prefetched_returns():
+    """Warm the optimizer's price and moment caches once per session.
+    
+    The optimizer caches prices and annualized moments per symbols and
+    period, so tests optimizing this universe after the fixture has run skip
+    the data loading entirely.
+    """
+    from app.services.optimization import portfolio_optimizer
+    return portfolio_optimizer._prepare_arrays(OPTIMIZER_TEST_SYMBOLS, "1y")
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--profile",
+        action="store_true",
+        help="save a pyinstrument session of each test to .profiles/ (view with pyinstrument --load)"
+    )
+
+
+@pytest.fixture(autouse=True)
+def _profile(request):
+    """Profile the test with pyinstrument when run with ``--profile``."""
+    if not request.config.getoption("--profile"):
+        yield
+        return
+    
+    from pyinstrument import Profiler
+    
+    profiler = Profiler()
+    profiler.start()
+    yield
+    profiler.stop()
+    
+    profiles_dir = Path(request.config.rootpath) / ".profiles"
+    profiles_dir.mkdir(exist_ok=True)
+    profiler.last_session.save(profiles_dir / f"{request.node.name}.pyisession")
@@ -2,11 +2,15 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 import uvicorn
+import logging
 import os
 
 from app.config import settings
 from app.api.api_v1.api import api_router
 from app.database import engine, create_tables
+from app.services.data_service import data_service
+
+logging.basicConfig(level=settings.LOG_LEVEL)
 
 # Create FastAPI instance
 app = FastAPI(
@@ -39,6 +43,11 @@ async def startup_event():
     """Create database tables on startup."""
     create_tables()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the market data service's HTTP client and event loop."""
+    data_service.close()
+
 @app.get("/", include_in_schema=False)
 async def root():
     """Redirect root to docs."""
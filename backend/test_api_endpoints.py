@@ -3,14 +3,96 @@
 Test the optimization API endpoints
 """
 
-import requests
+import aiohttp
+import asyncio
 import json
+import logging
+import orjson
+import queue
+import sys
+import time
 import uuid
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from jose import jwt
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
-def get_auth_token():
-    """Register a test user and get auth token"""
+# Report lines are queued and written by a single listener thread, so
+# concurrent requests never contend on stdout
+logger = logging.getLogger("portopt.tests")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_queue = queue.Queue(-1)
+logger.addHandler(QueueHandler(_log_queue))
+
+# Responses worth retrying: rate limiting and an unavailable or restarting server
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Tokens are reused across runs until shortly before they expire
+TOKEN_CACHE_FILE = Path.home() / ".cache" / "portfolio-opt" / "token.json"
+DEFAULT_TOKEN_LIFETIME = 50 * 60
+
+def _load_cached_token(base_url):
+    """Cached access token for ``base_url``, or None if missing, stale or unreadable"""
+    try:
+        cached = json.loads(TOKEN_CACHE_FILE.read_text())
+        if cached["base_url"] == base_url and time.time() < cached["expiry"] - 60:
+            return cached["access_token"]
+    except Exception:
+        pass
+    return None
+
+def _save_cached_token(base_url, username, token):
+    """Persist ``token`` with the expiry from its ``exp`` claim"""
+    try:
+        expiry = jwt.get_unverified_claims(token)["exp"]
+    except Exception:
+        expiry = time.time() + DEFAULT_TOKEN_LIFETIME
+    
+    try:
+        TOKEN_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        TOKEN_CACHE_FILE.write_text(json.dumps({
+            "base_url": base_url,
+            "username": username,
+            "access_token": token,
+            "expiry": expiry
+        }))
+    except OSError as e:
+        logger.info(f"⚠️  Could not cache token: {e}")
+
+def _is_transient(error):
+    """Whether a failed request is worth retrying"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+@retry(
+    retry=retry_if_exception(_is_transient),
+    wait=wait_exponential(multiplier=0.4),
+    stop=stop_after_attempt(5),
+    reraise=True
+)
+async def post(session, url, **kwargs):
+    """POST with backoff on transient failures, returning the status code and body
+    
+    The body is the decoded JSON on success and the raw text otherwise.
+    """
+    async with session.post(url, **kwargs) as response:
+        if response.status in RETRY_STATUSES:
+            response.raise_for_status()
+        if response.status == 200:
+            return response.status, await response.json(loads=orjson.loads)
+        return response.status, await response.text()
+
+async def get_auth_token(session):
+    """Register a test user and get auth token, reusing a cached one while valid"""
     base_url = "http://localhost:8000/api/v1/auth"
     
+    token = _load_cached_token(base_url)
+    if token:
+        logger.info("♻️  Reusing cached token")
+        return token
+    
     # Generate unique test user
     test_id = str(uuid.uuid4())[:8]
     test_user = {
@@ -21,151 +103,174 @@ def get_auth_token():
     
     try:
         # Register user
-        print(f"📝 Registering test user: {test_user['username']}")
-        register_response = requests.post(
-            f"{base_url}/register",
-            json=test_user,
-            timeout=10
-        )
-        
-        if register_response.status_code != 200:
-            print(f"⚠️  Registration failed: {register_response.text}")
+        logger.info(f"📝 Registering test user: {test_user['username']}")
+        status, body = await post(session, f"{base_url}/register", json=test_user)
+        if status != 200:
+            logger.info(f"⚠️  Registration failed: {body}")
             return None
         
         # Login to get token
-        print(f"🔐 Logging in...")
+        logger.info(f"🔐 Logging in...")
         login_data = {
             "username": test_user["username"],
             "password": test_user["password"]
         }
         
-        login_response = requests.post(
-            f"{base_url}/login",
-            data=login_data,  # OAuth2 expects form data
-            timeout=10
-        )
-        
-        if login_response.status_code != 200:
-            print(f"⚠️  Login failed: {login_response.text}")
+        # OAuth2 expects form data
+        status, token_data = await post(session, f"{base_url}/login", data=login_data)
+        if status != 200:
+            logger.info(f"⚠️  Login failed: {token_data}")
             return None
         
-        token_data = login_response.json()
-        return token_data.get("access_token")
-        
+        token = token_data.get("access_token")
+        if token:
+            _save_cached_token(base_url, test_user["username"], token)
+        return token
+    
     except Exception as e:
-        print(f"❌ Auth error: {e}")
+        logger.info(f"❌ Auth error: {e}")
         return None
 
-def test_optimization_api():
-    """Test all optimization methods via API"""
-    
-    # Get authentication token
-    print("🔑 Getting authentication token...")
-    token = get_auth_token()
-    
-    if not token:
-        print("❌ Failed to get authentication token. Aborting tests.")
-        return {}
-    
-    print(f"✅ Got token: {token[:20]}...")
+async def run_optimization_tests():
+    """Test all optimization methods via API over one keep-alive session"""
     
-    base_url = "http://localhost:8000/api/v1/optimization/optimize"
-    
-    # Test data
-    test_data = {
-        "symbols": ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"],
-        "risk_tolerance": "moderate"
-    }
-    
-    optimization_types = [
-        "mean_variance",
-        "risk_parity", 
-        "minimum_variance",
-        "monte_carlo"
-    ]
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {token}"
-    }
-    
-    print("🚀 Testing Portfolio Optimization API Endpoints...")
-    print("=" * 60)
+    connector = aiohttp.TCPConnector(limit=20, keepalive_timeout=30)
+    # Fail fast on connecting, but give the optimizations time to run
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=3.05, sock_read=30)
+    # Bodies are encoded and responses decoded with orjson, which parses the
+    # float-heavy optimization results much faster than the json module
+    async with aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        json_serialize=lambda obj: orjson.dumps(obj).decode()
+    ) as session:
+        # Get authentication token
+        logger.info("🔑 Getting authentication token...")
+        token = await get_auth_token(session)
+        
+        if not token:
+            logger.info("❌ Failed to get authentication token. Aborting tests.")
+            return {}
+        
+        logger.info(f"✅ Got token: {token[:20]}...")
+        
+        # Throw-away request so connection setup and the server's first-request
+        # warm-up are not billed to the first optimization, and so an
+        # unreachable server fails once here rather than once per optimization
+        try:
+            async with session.get("http://localhost:8000/health", timeout=aiohttp.ClientTimeout(total=3)) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.info(f"❌ Server not reachable: {e}. Aborting tests.")
+            return {}
+        
+        batch_url = "http://localhost:8000/api/v1/optimization/optimize/batch"
+        
+        # Test data
+        test_data = {
+            "symbols": ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"],
+            "risk_tolerance": "moderate"
+        }
+        
+        optimization_types = [
+            "mean_variance",
+            "risk_parity",
+            "minimum_variance",
+            "monte_carlo"
+        ]
+        
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {token}"
+        }
+        
+        logger.info("🚀 Testing Portfolio Optimization API Endpoints...")
+        logger.info("=" * 60)
+        
+        # All methods go in one batch request, so the server loads the price
+        # history and estimates the inputs once instead of once per method
+        body = {
+            **test_data,
+            "methods": optimization_types,
+            "num_portfolios": 500
+        }
+        
+        try:
+            status, batch = await post(session, batch_url, headers=headers, json=body)
+        except Exception as e:
+            batch_error = f"REQUEST ERROR\n   {str(e) or type(e).__name__}"
+        else:
+            batch_error = None if status == 200 else f"HTTP {status}\n   Error: {batch}"
     
     results = {}
     
     for opt_type in optimization_types:
-        print(f"\n📊 Testing {opt_type.upper()} optimization...")
-        
-        # Prepare request data
-        request_data = test_data.copy()
-        request_data["optimization_type"] = opt_type
+        # One log record per optimization type keeps its lines together
+        lines = [f"\n📊 Testing {opt_type.upper()} optimization..."]
         
-        # Add specific parameters for Monte Carlo
-        if opt_type == "monte_carlo":
-            request_data["num_portfolios"] = 500
+        if batch_error:
+            lines.append(f"❌ {opt_type}: {batch_error}")
+            results[opt_type] = None
+            logger.info("\n".join(lines))
+            continue
         
-        try:
-            # Make API request
-            response = requests.post(
-                base_url,
-                headers=headers,
-                json=request_data,
-                timeout=30
-            )
+        result = batch["results"].get(opt_type)
+        if result is not None:
+            results[opt_type] = result
             
-            if response.status_code == 200:
-                result = response.json()
-                results[opt_type] = result
-                
-                print(f"✅ {opt_type}: SUCCESS")
-                print(f"   Return: {result['expected_return']:.1%}")
-                print(f"   Vol: {result['expected_volatility']:.1%}")
-                print(f"   Sharpe: {result['sharpe_ratio']:.3f}")
-                print(f"   Weights: {[f'{w:.1%}' for w in result['weights']]}")
-                
-                # Monte Carlo specific info
-                if opt_type == "monte_carlo" and "num_simulations" in result:
-                    print(f"   Simulations: {result['num_simulations']}")
-                
-            else:
-                print(f"❌ {opt_type}: HTTP {response.status_code}")
-                print(f"   Error: {response.text}")
-                results[opt_type] = None
-        
-        except requests.exceptions.RequestException as e:
-            print(f"❌ {opt_type}: REQUEST ERROR")
-            print(f"   {str(e)}")
-            results[opt_type] = None
+            lines.append(f"✅ {opt_type}: SUCCESS")
+            lines.append(f"   Return: {result['expected_return']:.1%}")
+            lines.append(f"   Vol: {result['expected_volatility']:.1%}")
+            lines.append(f"   Sharpe: {result['sharpe_ratio']:.3f}")
+            lines.append(f"   Weights: {[f'{w:.1%}' for w in result['weights']]}")
+            
+            # Monte Carlo specific info
+            if opt_type == "monte_carlo" and "num_simulations" in result:
+                lines.append(f"   Simulations: {result['num_simulations']}")
         
-        except Exception as e:
-            print(f"❌ {opt_type}: UNKNOWN ERROR")
-            print(f"   {str(e)}")
+        else:
+            lines.append(f"❌ {opt_type}: FAILED")
+            lines.append(f"   Error: {batch['errors'].get(opt_type, 'missing from batch response')}")
             results[opt_type] = None
+        
+        logger.info("\n".join(lines))
     
-    # Summary
-    print("\n" + "=" * 60)
-    print("📈 OPTIMIZATION API TEST SUMMARY")
-    print("=" * 60)
+    # Summary, emitted as a single record so the report stays in one piece
+    summary = ["\n" + "=" * 60]
+    summary.append("📈 OPTIMIZATION API TEST SUMMARY")
+    summary.append("=" * 60)
     
     successful = [opt for opt, result in results.items() if result is not None]
     failed = [opt for opt, result in results.items() if result is None]
     
-    print(f"✅ Successful: {len(successful)}/{len(optimization_types)}")
+    summary.append(f"✅ Successful: {len(successful)}/{len(optimization_types)}")
     for opt in successful:
-        print(f"   - {opt}")
+        summary.append(f"   - {opt}")
     
     if failed:
-        print(f"\n❌ Failed: {len(failed)}/{len(optimization_types)}")
+        summary.append(f"\n❌ Failed: {len(failed)}/{len(optimization_types)}")
         for opt in failed:
-            print(f"   - {opt}")
+            summary.append(f"   - {opt}")
     
     if len(successful) == len(optimization_types):
-        print("\n🎉 All optimization methods working perfectly!")
+        summary.append("\n🎉 All optimization methods working perfectly!")
     else:
-        print(f"\n⚠️  {len(failed)} optimization method(s) need attention")
+        summary.append(f"\n⚠️  {len(failed)} optimization method(s) need attention")
+    
+    logger.info("\n".join(summary))
     
     return results
 
+def test_optimization_api():
+    """Test all optimization methods via API"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(_log_queue, handler)
+    listener.start()
+    try:
+        return asyncio.run(run_optimization_tests())
+    finally:
+        listener.stop()
+
 if __name__ == "__main__":
     test_optimization_api()
@@ -0,0 +1,41 @@
+"""
+Benchmarks for the direct-call optimizer tests
+
+Run with ``npm run bench``; the timings are compared against the last saved
+run and the suite fails when any mean regresses by more than 15%.
+"""
+import pytest
+pytest.importorskip("pytest_benchmark")
+
+from app.services.optimization import portfolio_optimizer
+from app.models.schemas import RiskTolerance, OptimizationType
+
+pytestmark = pytest.mark.usefixtures("prefetched_returns")
+
+SYMBOLS = ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"]
+
+def test_monte_carlo_perf(benchmark):
+    """Benchmark Monte Carlo optimization on warm data caches."""
+    result = benchmark(
+        portfolio_optimizer.monte_carlo_optimization,
+        symbols=SYMBOLS,
+        risk_tolerance=RiskTolerance.MODERATE,
+        period="1y",
+        num_portfolios=1024
+    )
+    assert result["optimization_type"] == "monte_carlo"
+
+@pytest.mark.parametrize("optimization_type", [
+    OptimizationType.MEAN_VARIANCE,
+    OptimizationType.RISK_PARITY,
+    OptimizationType.MINIMUM_VARIANCE
+])
+def test_optimize_portfolio_perf(benchmark, optimization_type):
+    """Benchmark the optimize_portfolio dispatch for each SLSQP optimizer."""
+    result = benchmark(
+        portfolio_optimizer.optimize_portfolio,
+        symbols=SYMBOLS,
+        optimization_type=optimization_type,
+        period="1y"
+    )
+    assert result["optimization_type"] == optimization_type.value
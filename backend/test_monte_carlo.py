@@ -1,9 +1,11 @@
 """
 Test Monte Carlo optimization directly without authentication
 """
+import pytest
 from app.services.optimization import portfolio_optimizer
 from app.models.schemas import RiskTolerance
 
+@pytest.mark.usefixtures("prefetched_returns")
 def test_monte_carlo_optimization():
     """Test Monte Carlo optimization method directly."""
     symbols = ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"]
@@ -13,7 +15,7 @@ def test_monte_carlo_optimization():
             symbols=symbols,
             risk_tolerance=RiskTolerance.MODERATE,
             period="1y",
-            num_portfolios=1000
+            num_portfolios=1024
         )
         
         print("Monte Carlo Optimization Result:")
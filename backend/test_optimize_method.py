@@ -1,9 +1,11 @@
 """
 Test optimize_portfolio method with Monte Carlo
 """
+import pytest
 from app.services.optimization import portfolio_optimizer
 from app.models.schemas import RiskTolerance, OptimizationType
 
+@pytest.mark.usefixtures("prefetched_returns")
 def test_optimize_portfolio_monte_carlo():
     """Test optimize_portfolio method with Monte Carlo type."""
     symbols = ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"]
@@ -14,7 +16,7 @@ def test_optimize_portfolio_monte_carlo():
             optimization_type=OptimizationType.MONTE_CARLO,
             risk_tolerance=RiskTolerance.MODERATE,
             period="1y",
-            num_portfolios=500  # Smaller number for faster testing
+            num_portfolios=1024
         )
         
         print("Optimize Portfolio (Monte Carlo) Result:")
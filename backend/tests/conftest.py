@@ -0,0 +1,37 @@
+import os
+from functools import lru_cache
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def data_service(tmp_path_factory):
+    """One market data service shared by every test in the session.
+    
+    Each pytest-xdist worker gets its own history and HTTP cache files so
+    parallel workers never write the same files.
+    """
+    from app.config import settings
+    from app.services.data_service import MarketDataService
+    
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        worker_dir = tmp_path_factory.getbasetemp() / worker
+        monkeypatch.setattr(settings, "HISTORY_CACHE_DIR", str(worker_dir / "history_cache"))
+        monkeypatch.setattr(settings, "YF_HTTP_CACHE_PATH", str(worker_dir / "yfinance.cache"))
+        service = MarketDataService()
+        yield service
+        service.close()
+
+
+@pytest.fixture(scope="session")
+def cached_hist(data_service):
+    """``get_historical_data`` memoized per (symbol, period) for the whole session.
+    
+    Tests that only assert on the shape of the result share one fetch instead
+    of repeating it; the results must be treated as read-only.
+    """
+    @lru_cache(maxsize=256)
+    def fetch(symbol, period="1mo"):
+        return data_service.get_historical_data(symbol=symbol, period=period)
+    return fetch